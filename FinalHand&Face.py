@@ -6,28 +6,61 @@ import numpy as np
 import time
 import random
 import math
+import os
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import tuner
+from recorder import GameplayRecorder
+from telemetry import TelemetryStore
+import governor
+from trail import BladeTrail
+import replay
+from motion import MotionDetector
+import render
+from hud import HUD
+
+# ----------------------------
+# OpenCV Video Capture Setup
+# ----------------------------
+cap = cv2.VideoCapture(0)
+if not cap.isOpened():
+    raise RuntimeError("Unable to access the webcam.")
 
 # ----------------------------
 # MediaPipe Hand Tracking Setup
 # ----------------------------
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,      # continuous video stream
-    max_num_hands=1,              # detect one hand at most
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.5)
+
+def build_hands(model_complexity):
+    return mp_hands.Hands(
+        static_image_mode=False,      # continuous video stream
+        max_num_hands=1,              # detect one hand at most
+        model_complexity=model_complexity,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.5)
+
+# Model complexity and inference resolution are benchmarked once per machine and cached.
+hand_tuning = tuner.load_or_calibrate("hand", cap, build_hands, tuner.read_hand_landmark,
+                                      complexities=(0, 1))
+hands = build_hands(hand_tuning["model_complexity"])
 mp_drawing = mp.solutions.drawing_utils
 
 # ----------------------------
 # MediaPipe Face Mesh Setup (for Eye Tracking) with increased sensitivity
 # ----------------------------
 mp_face_mesh = mp.solutions.face_mesh
-face_mesh = mp_face_mesh.FaceMesh(
-    static_image_mode=False,
-    max_num_faces=1,
-    refine_landmarks=True,  # enables iris landmarks
-    min_detection_confidence=0.3,  # lowered for increased detection sensitivity
-    min_tracking_confidence=0.3)   # lowered for increased tracking sensitivity
+
+def build_face_mesh(model_complexity=None):
+    # FaceMesh has no model_complexity option; only its input resolution is tuned.
+    return mp_face_mesh.FaceMesh(
+        static_image_mode=False,
+        max_num_faces=1,
+        refine_landmarks=True,  # enables iris landmarks
+        min_detection_confidence=0.3,  # lowered for increased detection sensitivity
+        min_tracking_confidence=0.3)   # lowered for increased tracking sensitivity
+
+face_tuning = tuner.load_or_calibrate("face", cap, build_face_mesh, tuner.read_iris_landmark)
+face_mesh = build_face_mesh()
 
 # ----------------------------
 # PyGame Setup (Full Screen)
@@ -35,12 +68,30 @@ face_mesh = mp_face_mesh.FaceMesh(
 pygame.init()
 pygame.mixer.init()  # initialize the mixer for sound effects
 
-# Get the full screen resolution.
-screen_width, screen_height = pygame.display.Info().current_w, pygame.display.Info().current_h
-screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
-pygame.display.set_caption("Fruit Ninja: Multiple Cursor Modes")
+# Internal render resolution. All game coordinates (spawn bounds, cursor mapping,
+# HUD layout) live in this logical space and SDL upscales the finished frame to the
+# display, so per-pixel cost no longer depends on the monitor. Set to None to render
+# at the native display resolution instead.
+RENDER_RESOLUTION = (1280, 720)
+# "surface" draws in software onto the display surface. "texture" uses the SDL2 GPU
+# renderer with cached sprite textures, and falls back to "surface" where unavailable.
+RENDER_BACKEND = "surface"
+
+if RENDER_RESOLUTION is not None:
+    screen_width, screen_height = RENDER_RESOLUTION
+else:
+    screen_width, screen_height = pygame.display.Info().current_w, pygame.display.Info().current_h
+display = render.create_display(RENDER_BACKEND, (screen_width, screen_height), "Fruit Ninja: Multiple Cursor Modes",
+                                scaled=RENDER_RESOLUTION is not None)
 clock = pygame.time.Clock()
-font = pygame.font.Font(None, 36)
+font = pygame.font.Font(None, 36)  # shared by the HUD, the idle prompt and the game-over screen
+
+# Each HUD element keeps its font.render() surface and re-renders only when its value changes.
+hud = HUD(font)
+hud.add("score", (10, 10), template="Score: {}")
+hud.add("time", (screen_width - 150, 10), template="Time: {}")
+hud.add("lod", (10, screen_height - 40), color=(255, 165, 0))
+hud.add("mode", (10, 50), color=(200, 200, 200), template="Mode: {} (Press M to toggle)")
 
 # Load sounds (ensure these files exist or update with correct paths)
 try:
@@ -52,21 +103,56 @@ except Exception as e:
     bomb_sound = None
 
 # ----------------------------
-# Game Timer Setup
+# Gameplay Recording Setup (press R to start/stop)
+# ----------------------------
+RECORD_FPS = 30
+RECORD_WITH_CAMERA = False  # put the camera view side by side with the game
+recorder = None
+
+# ----------------------------
+# Game Timer and RNG Setup
 # ----------------------------
 GAME_DURATION = 60  # seconds
-start_time = time.time()
+# The game clock advances by each frame's dt, and all gameplay randomness comes from
+# game_rng, so a session can be replayed exactly from its seed and per-frame inputs.
+game_time = 0.0
+GAME_SEED = None  # set to an int to play the same fruit sequence every time
+game_seed = GAME_SEED if GAME_SEED is not None else random.randrange(2 ** 32)
+game_rng = random.Random(game_seed)
+
+# ----------------------------
+# Replay Recording Setup (replays/*.fnr, watch with replay.py)
+# ----------------------------
+RECORD_REPLAYS = True
+
+# ----------------------------
+# Idle/Attract Mode Setup
+# ----------------------------
+# With no player detected for IDLE_AFTER seconds the game pauses, renders at IDLE_FPS and
+# swaps MediaPipe for a cheap frame-difference motion detector until someone moves.
+IDLE_AFTER = 10  # seconds
+IDLE_FPS = 10
+idle = False
+motion_detector = MotionDetector()
+attract_background = None  # dimmed game scene, rendered once per idle period
+
+# ----------------------------
+# Session Telemetry Setup (slices, bomb hits and frame timing go to a local SQLite db)
+# ----------------------------
+telemetry = TelemetryStore(os.path.basename(__file__))
+end_reason = "quit"
 
 # ----------------------------
 # Slicing Animation Class
 # ----------------------------
 class SlicingAnimation:
-    def __init__(self, pos, color, duration=0.3, max_radius=50):
+    def __init__(self, pos, color, duration=0.3, max_radius=50, quality="high"):
         self.pos = pos
         self.color = color
         self.duration = duration
         self.timer = duration
         self.max_radius = max_radius
+        self.quality = quality
 
     def update(self, dt):
         self.timer -= dt
@@ -75,6 +161,11 @@ class SlicingAnimation:
         progress = 1 - (self.timer / self.duration)
         radius = int(progress * self.max_radius)
         alpha = max(255 - int(progress * 255), 0)
+        if self.quality == "low":
+            # Cheap version: an expanding ring drawn straight onto the target, no alpha surface.
+            if radius > 2:
+                pygame.draw.circle(surface, self.color, self.pos, radius, 2)
+            return
         temp_surf = pygame.Surface((self.max_radius * 2, self.max_radius * 2), pygame.SRCALPHA)
         pygame.gfxdraw.aacircle(temp_surf, self.max_radius, self.max_radius, radius, self.color + (alpha,))
         pygame.gfxdraw.filled_circle(temp_surf, self.max_radius, self.max_radius, radius, self.color + (alpha,))
@@ -95,14 +186,14 @@ class SplashEffect:
         self.timer = duration
         self.particles = []
         for _ in range(num_particles):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(50, 200)
+            angle = game_rng.uniform(0, 2 * math.pi)
+            speed = game_rng.uniform(50, 200)
             vx = speed * math.cos(angle)
             vy = speed * math.sin(angle)
             self.particles.append({
                 'pos': [pos[0], pos[1]],
                 'vel': [vx, vy],
-                'radius': random.randint(2, 5)
+                'radius': game_rng.randint(2, 5)
             })
 
     def update(self, dt):
@@ -143,15 +234,15 @@ def smooth_polygon(points, iterations=2):
 # ----------------------------
 # Utility: Create an Irregular, Amoeba-like Water Splash Surface
 # ----------------------------
-def create_water_splash_surface(size, color, irregularity=0.2, layers=5):
+def create_water_splash_surface(size, color, irregularity=0.2, layers=5, rng=random):
     padded_size = int(size * 1.5)
     surf = pygame.Surface((padded_size, padded_size), pygame.SRCALPHA)
     center = padded_size / 2
-    num_points = random.randint(8, 12)
+    num_points = rng.randint(8, 12)
     base_points = []
     for i in range(num_points):
-        angle = 2 * math.pi * i / num_points + random.uniform(-irregularity, irregularity)
-        r = center * random.uniform(0.7, 1.0)
+        angle = 2 * math.pi * i / num_points + rng.uniform(-irregularity, irregularity)
+        r = center * rng.uniform(0.7, 1.0)
         x = center + r * math.cos(angle)
         y = center + r * math.sin(angle)
         base_points.append((x, y))
@@ -162,12 +253,12 @@ def create_water_splash_surface(size, color, irregularity=0.2, layers=5):
         alpha = int(150 * (1 - layer / layers))
         pygame.draw.polygon(surf, color[:3] + (alpha,), points)
     for _ in range(15):
-        angle = random.uniform(0, 2 * math.pi)
-        r = center + random.uniform(0, center * 0.4)
+        angle = rng.uniform(0, 2 * math.pi)
+        r = center + rng.uniform(0, center * 0.4)
         x = center + r * math.cos(angle)
         y = center + r * math.sin(angle)
-        splatter_radius = random.randint(2, 5)
-        splatter_alpha = random.randint(50, 100)
+        splatter_radius = rng.randint(2, 5)
+        splatter_alpha = rng.randint(50, 100)
         pygame.draw.circle(surf, color[:3] + (splatter_alpha,), (int(x), int(y)), splatter_radius)
     return surf
 
@@ -181,7 +272,22 @@ class Stain:
         self.duration = duration
         self.timer = duration
         self.size = size
-        self.image = create_water_splash_surface(self.size, color, irregularity=0.2, layers=5)
+        # The splash shape has its own seed so snapshots can rebuild it instead of storing pixels.
+        self.seed = game_rng.getrandbits(32)
+        self.image = self.create_image()
+
+    def create_image(self):
+        return create_water_splash_surface(self.size, self.color, irregularity=0.2, layers=5,
+                                           rng=random.Random(self.seed))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["image"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.image = self.create_image()
 
     def update(self, dt):
         self.timer -= dt
@@ -196,6 +302,9 @@ class Stain:
     def is_finished(self):
         return self.timer <= 0
 
+# Effects level of detail: scaled down when frames run over budget.
+effects_governor = governor.EffectsGovernor()
+
 # Lists to hold active animations, splash effects, and stains.
 slicing_animations = []
 splash_effects = []
@@ -204,11 +313,15 @@ stains = []  # persistent background water splash stains
 # ----------------------------
 # Fruit Class Definition
 # ----------------------------
+# Past positions kept per fruit for lag-compensated hit testing (~200 ms at 60 fps).
+FRUIT_HISTORY_LENGTH = 12
+
 class Fruit:
     def __init__(self, pos, velocity, fruit_type):
         self.pos = list(pos)         # [x, y]
         self.velocity = list(velocity)  # [vx, vy]
         self.type = fruit_type
+        self.history = collections.deque(maxlen=FRUIT_HISTORY_LENGTH)  # (time, x, y) ring buffer
         if self.type == "fruit":
             base_radius = 20
             self.color = (255, 0, 0)  # red for apple
@@ -229,7 +342,7 @@ class Fruit:
             self.color = (30, 30, 30)
             self.fuse_color = (255, 140, 0)
 
-        scale_factor = random.uniform(1.5, 1.8)
+        scale_factor = game_rng.uniform(1.5, 1.8)
         self.radius = int(base_radius * scale_factor)
         if self.type == "watermelon":
             self.seeds = [(int(dx * scale_factor), int(dy * scale_factor)) for dx, dy in self.seeds]
@@ -239,6 +352,23 @@ class Fruit:
         self.pos[1] += self.velocity[1] * dt
         self.velocity[1] += 300 * dt  # gravity
 
+    def record_position(self, t):
+        self.history.append((t, self.pos[0], self.pos[1]))
+
+    def position_at(self, t):
+        # Rewind the fruit to time t, interpolating between recorded frames. Times older
+        # than the history are clamped to the oldest recorded position.
+        if not self.history or t >= self.history[-1][0]:
+            return self.pos[0], self.pos[1]
+        newer = None
+        for sample in reversed(self.history):
+            if sample[0] <= t:
+                f = (t - sample[0]) / (newer[0] - sample[0])
+                return (sample[1] + (newer[1] - sample[1]) * f,
+                        sample[2] + (newer[2] - sample[2]) * f)
+            newer = sample
+        return newer[1], newer[2]
+
     def draw(self, surface):
         if self.type == "banana":
             x, y = int(self.pos[0]), int(self.pos[1])
@@ -274,15 +404,15 @@ class Fruit:
             pygame.draw.circle(surface, (255, 255, 0), fuse_end, 4)
 
 def spawn_fruit(elapsed_time):
-    x = random.randint(50, screen_width - 50)
+    x = game_rng.randint(50, screen_width - 50)
     y = screen_height + 30  # start below screen
-    vx = random.uniform(-100, 100)
-    vy = random.uniform(-700, -400)
+    vx = game_rng.uniform(-100, 100)
+    vy = game_rng.uniform(-700, -400)
     bomb_probability = 0.1 + 0.1 * (elapsed_time / GAME_DURATION)
     apple_prob = 0.6
     banana_prob = 0.15
     watermelon_prob = 0.15 - (bomb_probability - 0.1)
-    r = random.random()
+    r = game_rng.random()
     if r < apple_prob:
         fruit_type = "fruit"  # apple
     elif r < apple_prob + banana_prob:
@@ -294,19 +424,13 @@ def spawn_fruit(elapsed_time):
     return Fruit((x, y), (vx, vy), fruit_type)
 
 fruits = []
-last_spawn_time = time.time()
+last_spawn_time = 0.0
 score = 0
 game_over = False
 
-# ----------------------------
-# OpenCV Video Capture Setup
-# ----------------------------
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    raise RuntimeError("Unable to access the webcam.")
-
 def get_index_finger_tip(frame):
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    small = tuner.resize_for_inference(frame, hand_tuning["input_width"])
+    frame_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
     results = hands.process(frame_rgb)
     if results.multi_hand_landmarks:
         hand_landmarks = results.multi_hand_landmarks[0]
@@ -317,7 +441,8 @@ def get_index_finger_tip(frame):
     return None
 
 def get_eye_cursor(frame):
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    small = tuner.resize_for_inference(frame, face_tuning["input_width"])
+    frame_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
     results = face_mesh.process(frame_rgb)
     if results.multi_face_landmarks:
         landmarks = results.multi_face_landmarks[0].landmark
@@ -330,137 +455,121 @@ def get_eye_cursor(frame):
         return (x_px, y_px)
     return None
 
-# Variable for smoothed cursor (common for both modes)
-smoothed_cursor = None
-
 # ----------------------------
-# Mode Setup: "hand" or "eye"
+# Parallel Tracker Execution
 # ----------------------------
-mode = "hand"  # default mode is hand tracking
-
-# Sensitivity factors for movement.
-eye_sensitivity = 3.5  
-hand_sensitivity = 1.45 
+class ParallelTrackers:
+    # Each MediaPipe graph gets its own worker thread, so a graph is never entered
+    # from two threads at once. MediaPipe releases the GIL while a graph runs, so the
+    # hand and face graphs process the same frame on separate cores. process() waits
+    # for every tracker before returning, so all results always belong to that frame.
+    def __init__(self, trackers):
+        self.trackers = trackers
+        self.executors = {name: ThreadPoolExecutor(max_workers=1) for name in trackers}
+
+    def process(self, frame, names):
+        futures = {name: self.executors[name].submit(self.trackers[name], frame) for name in names}
+        return {name: future.result() for name, future in futures.items()}
+
+    def close(self):
+        for executor in self.executors.values():
+            executor.shutdown()
+
+trackers = ParallelTrackers({"hand": get_index_finger_tip, "eye": get_eye_cursor})
+
+def map_to_screen(pos, frame, sensitivity):
+    cam_h, cam_w, _ = frame.shape
+    center_x, center_y = cam_w / 2, cam_h / 2
+    offset_x = pos[0] - center_x
+    offset_y = pos[1] - center_y
+    return (int(screen_width / 2 + offset_x * sensitivity),
+            int(screen_height / 2 + offset_y * sensitivity))
+
+def cursor_hits(fruit, cursor, cursor_time):
+    # cursor_time is on the game clock: when the camera frame behind the cursor was captured.
+    hit_x, hit_y = fruit.position_at(cursor_time)
+    return np.hypot(hit_x - cursor[0], hit_y - cursor[1]) < fruit.radius
 
 # ----------------------------
-# Main Game Loop
+# Game Update (one simulation step, also driven by the replay viewer)
 # ----------------------------
-running = True
-while running:
-    dt = clock.tick(60) / 1000.0  # seconds per frame
-
-    # Process events including a mode toggle (press M)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                running = False
-            elif event.key == pygame.K_m:
-                # Toggle between "hand" and "eye" mode
-                mode = "eye" if mode == "hand" else "hand"
-                smoothed_cursor = None  # reset smoothing when switching modes
-
-    if game_over:
-        running = False
-
-    elapsed_time = time.time() - start_time
-    remaining_time = max(0, int(GAME_DURATION - elapsed_time))
-    if remaining_time <= 0:
-        running = False
-
-    ret, frame = cap.read()
-    if not ret:
-        continue
-    frame = cv2.flip(frame, 1)  # mirror view
-
-    # --- Cursor Position Depending on Mode ---
-    cursor_pos = None
-    if mode == "hand":
-        pos = get_index_finger_tip(frame)
-        if pos is not None:
-            cam_h, cam_w, _ = frame.shape
-            center_x, center_y = cam_w / 2, cam_h / 2
-            offset_x = pos[0] - center_x
-            offset_y = pos[1] - center_y
-            new_x = int(screen_width / 2 + offset_x * hand_sensitivity)
-            new_y = int(screen_height / 2 + offset_y * hand_sensitivity)
-            cursor_pos = (new_x, new_y)
-    elif mode == "eye":
-        pos = get_eye_cursor(frame)
-        if pos is not None:
-            cam_h, cam_w, _ = frame.shape
-            center_x, center_y = cam_w / 2, cam_h / 2
-            offset_x = pos[0] - center_x
-            offset_y = pos[1] - center_y
-            new_x = int(screen_width / 2 + offset_x * eye_sensitivity)
-            new_y = int(screen_height / 2 + offset_y * eye_sensitivity)
-            cursor_pos = (new_x, new_y)
-
-    # --- Smooth the Cursor ---
-    if cursor_pos is not None:
-        if smoothed_cursor is None:
-            smoothed_cursor = cursor_pos
-        else:
-            smoothed_cursor = (int(smoothed_cursor[0] * 0.5 + cursor_pos[0] * 0.5),
-                               int(smoothed_cursor[1] * 0.5 + cursor_pos[1] * 0.5))
-    # If no new detection, smoothed_cursor remains unchanged.
+def update_game(dt, cursors):
+    # cursors: list of ((x, y), age) for the active cursors, where age is how many
+    # seconds before this frame the camera frame behind the cursor was captured.
+    global game_time, last_spawn_time, fruits, slicing_animations, splash_effects, stains
+    global score, game_over, end_reason
+    game_time += dt
 
     # --- Gradually Increase Spawn Rate ---
-    current_spawn_interval = max(2.0 - (elapsed_time / GAME_DURATION) * 1.5, 0.5)
-    current_time = time.time()
-    if current_time - last_spawn_time > current_spawn_interval:
-        fruits.append(spawn_fruit(elapsed_time))
-        last_spawn_time = current_time
+    current_spawn_interval = max(2.0 - (game_time / GAME_DURATION) * 1.5, 0.5)
+    if game_time - last_spawn_time > current_spawn_interval:
+        fruits.append(spawn_fruit(game_time))
+        last_spawn_time = game_time
 
     # --- Update fruits ---
     for fruit in fruits:
         fruit.update(dt)
-    fruits = [fruit for fruit in fruits if fruit.pos[1] < screen_height + 50]
+        fruit.record_position(game_time)
+    # Keep a fruit until its oldest recorded position is off screen too, so lag-compensated
+    # hit tests can still reach it while the camera frame behind the cursor showed it.
+    fruits = [fruit for fruit in fruits if fruit.history[0][2] < screen_height + 50]
 
     # --- Check collisions (slicing) ---
+    # A cursor sample older than the fruit history means tracking lost the hand and the
+    # cursor stays where it was last seen, so it is tested where fruits are now.
+    cursors = [(pos, age if age <= FRUIT_HISTORY_LENGTH / 60 else 0.0) for pos, age in cursors]
+    # Lag compensation: each cursor is tested against where the fruit was when the
+    # camera frame behind that cursor was captured, not where it is now.
     for fruit in fruits[:]:
-        if smoothed_cursor is not None:
-            dist = np.hypot(fruit.pos[0] - smoothed_cursor[0], fruit.pos[1] - smoothed_cursor[1])
-            if dist < fruit.radius:
-                if fruit.type == "bomb":
-                    anim_color = (255, 0, 0)
-                elif fruit.type == "banana":
-                    anim_color = (255, 255, 0)
+        if any(cursor_hits(fruit, cursor, game_time - cursor_age) for cursor, cursor_age in cursors):
+            if fruit.type == "bomb":
+                anim_color = (255, 0, 0)
+            elif fruit.type == "banana":
+                anim_color = (255, 255, 0)
+            elif fruit.type == "watermelon":
+                anim_color = (0, 255, 0)
+            else:
+                anim_color = (255, 0, 0)
+            fx = effects_governor.settings
+            slicing_animations.append(SlicingAnimation((int(fruit.pos[0]), int(fruit.pos[1])), anim_color,
+                                                       quality=fx["animation_quality"]))
+            if fruit.type != "bomb":
+                if fruit.type == "banana":
+                    splash_color = (255, 255, 0)
                 elif fruit.type == "watermelon":
-                    anim_color = (0, 255, 0)
+                    splash_color = (0, 255, 0)
                 else:
-                    anim_color = (255, 0, 0)
-                slicing_animations.append(SlicingAnimation((int(fruit.pos[0]), int(fruit.pos[1])), anim_color))
-                if fruit.type != "bomb":
-                    if fruit.type == "banana":
-                        splash_color = (255, 255, 0)
-                    elif fruit.type == "watermelon":
-                        splash_color = (0, 255, 0)
-                    else:
-                        splash_color = (255, 0, 0)
-                    splash_effects.append(SplashEffect((int(fruit.pos[0]), int(fruit.pos[1])), splash_color))
-                    stains.append(Stain((int(fruit.pos[0]), int(fruit.pos[1])), splash_color, duration=10, size=random.randint(50,80)))
-                if fruit.type == "bomb":
-                    if bomb_sound:
-                        bomb_sound.play()
-                    print("Bomb sliced! Game over.")
-                    game_over = True
-                    fruits.remove(fruit)
-                    break
+                    splash_color = (255, 0, 0)
+                splash_effects.append(SplashEffect((int(fruit.pos[0]), int(fruit.pos[1])), splash_color,
+                                                   num_particles=fx["particles"]))
+                stains.append(Stain((int(fruit.pos[0]), int(fruit.pos[1])), splash_color, duration=fx["stain_duration"],
+                                    size=int(game_rng.randint(50,80) * fx["stain_scale"])))
+            if fruit.type == "bomb":
+                if bomb_sound:
+                    bomb_sound.play()
+                if telemetry is not None:
+                    telemetry.record_bomb(score)
+                game_over = True
+                end_reason = "bomb"
+                fruits.remove(fruit)
+                break
+            else:
+                if slice_sound:
+                    slice_sound.play()
+                fruits.remove(fruit)
+                if fruit.type == "banana":
+                    score += 2
+                elif fruit.type == "watermelon":
+                    score += 3
                 else:
-                    if slice_sound:
-                        slice_sound.play()
-                    fruits.remove(fruit)
-                    if fruit.type == "banana":
-                        score += 2
-                        print("Banana sliced! Score:", score)
-                    elif fruit.type == "watermelon":
-                        score += 3
-                        print("Watermelon sliced! Score:", score)
-                    else:
-                        score += 1
-                        print("Apple sliced! Score:", score)
+                    score += 1
+                if telemetry is not None:
+                    telemetry.record_slice(fruit.type, score)
+
+    # --- Enforce global effect caps for the current level of detail ---
+    governor.trim(slicing_animations, effects_governor.settings["max_animations"])
+    governor.trim(splash_effects, effects_governor.settings["max_splashes"])
+    governor.trim(stains, effects_governor.settings["max_stains"])
 
     # --- Update slicing animations ---
     for anim in slicing_animations:
@@ -477,46 +586,237 @@ while running:
         stain.update(dt)
     stains = [stain for stain in stains if not stain.is_finished()]
 
-    # --- Render the game scene ---
-    screen.fill((54, 39, 18))
+def draw_game(display):
+    display.clear((54, 39, 18))
     num_lines = 10
     for i in range(1, num_lines):
         x = int(i * screen_width / num_lines)
-        pygame.draw.line(screen, (154, 123, 79), (x, 0), (x, screen_height), 1)
+        display.line((154, 123, 79), (x, 0), (x, screen_height))
     for stain in stains:
-        stain.draw(screen)
+        display.draw_stain(stain)
     for fruit in fruits:
-        fruit.draw(screen)
+        display.draw_fruit(fruit)
     for anim in slicing_animations:
-        anim.draw(screen)
+        display.draw_slicing_animation(anim)
     for splash in splash_effects:
-        splash.draw(screen)
-    if smoothed_cursor is not None:
-        # Draw a different cursor color depending on mode.
-        cursor_color = (0, 255, 255) if mode == "eye" else (255, 255, 255)
-        pygame.draw.circle(screen, cursor_color, smoothed_cursor, 5)
-    score_surface = font.render(f"Score: {score}", True, (255, 255, 255))
-    screen.blit(score_surface, (10, 10))
-    timer_surface = font.render(f"Time: {remaining_time}", True, (255, 255, 255))
-    screen.blit(timer_surface, (screen_width - 150, 10))
-    mode_surface = font.render(f"Mode: {mode.upper()} (Press M to toggle)", True, (200, 200, 200))
-    screen.blit(mode_surface, (10, 50))
-    pygame.display.flip()
+        display.draw_splash(splash)
+
+def render_attract_background(display):
+    # The game is paused while idle, so the dimmed scene is rendered once and reused.
+    draw_game(display)
+    background = display.capture().copy()
+    shade = pygame.Surface((screen_width, screen_height), pygame.SRCALPHA)
+    shade.fill((0, 0, 0, 160))
+    background.blit(shade, (0, 0))
+    return display.prepare(background)
+
+def draw_attract_screen(display, background, now):
+    display.blit(background, (0, 0))
+    # Pulse the prompt so the kiosk still looks alive at the idle frame rate.
+    brightness = int(155 + 100 * abs(math.sin(now * 2)))
+    prompt = font.render("Wave your hand to play!", True, (brightness, brightness, brightness))
+    display.blit(prompt, (screen_width // 2 - prompt.get_width() // 2, screen_height // 2 - prompt.get_height() // 2))
+
+# ----------------------------
+# Game State Snapshots (replay keyframes)
+# ----------------------------
+def snapshot_game():
+    return {
+        "game_time": game_time,
+        "last_spawn_time": last_spawn_time,
+        "score": score,
+        "game_over": game_over,
+        "end_reason": end_reason,
+        "fruits": fruits,
+        "slicing_animations": slicing_animations,
+        "splash_effects": splash_effects,
+        "stains": stains,
+        "rng_state": game_rng.getstate(),
+    }
+
+def restore_game(state):
+    global game_time, last_spawn_time, fruits, slicing_animations, splash_effects, stains
+    global score, game_over, end_reason
+    game_time = state["game_time"]
+    last_spawn_time = state["last_spawn_time"]
+    score = state["score"]
+    game_over = state["game_over"]
+    end_reason = state["end_reason"]
+    fruits = state["fruits"]
+    slicing_animations = state["slicing_animations"]
+    splash_effects = state["splash_effects"]
+    stains = state["stains"]
+    game_rng.setstate(state["rng_state"])
+
+# Smoothed cursor for each tracker; only the ones active in the current mode are used.
+smoothed_cursors = {"hand": None, "eye": None}
+# Capture time of the camera frame behind each tracker's latest cursor sample.
+cursor_capture_times = {"hand": None, "eye": None}
+last_detection_time = time.time()  # any tracker; drives idle mode
+
+replay_log = None
+if RECORD_REPLAYS:
+    replay_log = replay.ReplayWriter({"script": os.path.basename(__file__), "seed": game_seed,
+                                      "screen_size": [screen_width, screen_height]})
+
+# ----------------------------
+# Mode Setup: "hand", "eye" or "both"
+# ----------------------------
+mode = "hand"  # default mode is hand tracking
+MODES = ["hand", "eye", "both"]  # "both" runs hand and face cursors together (co-op / accessibility)
+MODE_TRACKERS = {"hand": ["hand"], "eye": ["eye"], "both": ["hand", "eye"]}
+CURSOR_COLORS = {"hand": (255, 255, 255), "eye": (0, 255, 255)}
+# Blade trail behind each cursor, showing the swipe path.
+blade_trails = {name: BladeTrail(color=color) for name, color in CURSOR_COLORS.items()}
+
+# Sensitivity factors for movement.
+eye_sensitivity = 3.5  
+hand_sensitivity = 1.45 
+sensitivities = {"hand": hand_sensitivity, "eye": eye_sensitivity}
+
+# ----------------------------
+# Main Game Loop
+# ----------------------------
+running = True
+while running:
+    dt_ms = clock.tick(IDLE_FPS if idle else 60)
+    dt = dt_ms / 1000.0  # seconds per frame
+    frame_start = time.perf_counter()
+
+    # Process events including a mode toggle (press M)
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            running = False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                running = False
+            elif event.key == pygame.K_r:
+                # Start or stop recording gameplay to a video file
+                if recorder is None:
+                    recorder = GameplayRecorder((screen_width, screen_height), fps=RECORD_FPS,
+                                                include_camera=RECORD_WITH_CAMERA)
+                else:
+                    print("Recording saved to", recorder.stop())
+                    recorder = None
+            elif event.key == pygame.K_m:
+                # Cycle through "hand", "eye" and "both" modes
+                mode = MODES[(MODES.index(mode) + 1) % len(MODES)]
+                smoothed_cursors = {"hand": None, "eye": None}  # reset smoothing when switching modes
+                for blade_trail in blade_trails.values():
+                    blade_trail.clear()
+                telemetry.record_event("mode", mode, score)
+
+    if game_over:
+        running = False
+
+    remaining_time = max(0, int(GAME_DURATION - game_time))
+    if remaining_time <= 0:
+        running = False
+        end_reason = "time"
+
+    capture_start = time.perf_counter()
+    ret, frame = cap.read()
+    capture_wait = time.perf_counter() - capture_start  # not counted against the frame budget
+    if not ret:
+        continue
+    capture_time = time.time()
+    frame = cv2.flip(frame, 1)  # mirror view
+
+    # --- Idle/Attract Mode: motion detection only, game paused ---
+    if idle:
+        if not motion_detector.detect(frame):
+            if attract_background is None:
+                attract_background = render_attract_background(display)
+            draw_attract_screen(display, attract_background, capture_time)
+            display.present()
+            continue
+        # Someone moved: resume full tracking on this same frame.
+        idle = False
+        attract_background = None
+        last_detection_time = capture_time
+        telemetry.record_event("idle", "end", score)
+
+    # --- Cursor Positions Depending on Mode (trackers run in parallel) ---
+    tracking_start = time.perf_counter()
+    positions = trackers.process(frame, MODE_TRACKERS[mode])
+    tracking_time = time.perf_counter() - tracking_start  # inference is not an effect cost either
+    if any(pos is not None for pos in positions.values()):
+        last_detection_time = capture_time
+    elif capture_time - last_detection_time > IDLE_AFTER:
+        idle = True
+        motion_detector.reset()
+        smoothed_cursors = {"hand": None, "eye": None}
+        telemetry.record_event("idle", "start", score)
+
+    # --- Smooth the Cursors ---
+    for name, pos in positions.items():
+        if pos is None:
+            continue  # no new detection, smoothed cursor remains unchanged
+        cursor_pos = map_to_screen(pos, frame, sensitivities[name])
+        cursor_capture_times[name] = capture_time
+        smoothed_cursor = smoothed_cursors[name]
+        if smoothed_cursor is None:
+            smoothed_cursors[name] = cursor_pos
+        else:
+            smoothed_cursors[name] = (int(smoothed_cursor[0] * 0.5 + cursor_pos[0] * 0.5),
+                                      int(smoothed_cursor[1] * 0.5 + cursor_pos[1] * 0.5))
+        blade_trails[name].add(capture_time, smoothed_cursors[name])
+    active_cursors = [(smoothed_cursors[name], cursor_capture_times[name]) for name in MODE_TRACKERS[mode]
+                      if smoothed_cursors[name] is not None]
+    telemetry.record_frame(dt, time.time() - capture_time)
+
+    # --- Advance the game (each step is logged first so it can be replayed) ---
+    now = time.time()
+    cursors = [(cursor, replay.cursor_age_ms(cursor_time, now)) for cursor, cursor_time in active_cursors]
+    if replay_log is not None:
+        if replay_log.needs_keyframe():
+            replay_log.write_keyframe(snapshot_game())
+        replay_log.write_frame(dt_ms, effects_governor.level, cursors)
+    update_game(dt, [(pos, age_ms / 1000) for pos, age_ms in cursors])
+
+    # --- Render the game scene ---
+    draw_game(display)
+    for name in MODE_TRACKERS[mode]:
+        display.draw_trail(blade_trails[name], now)
+        if smoothed_cursors[name] is not None:
+            # Draw a different cursor color for each tracker.
+            display.circle(CURSOR_COLORS[name], smoothed_cursors[name], 5)
+    hud.set("score", score)
+    hud.set("time", remaining_time)
+    if recorder is not None:
+        display.circle((255, 0, 0), (screen_width // 2, 22), 8)
+    # Let operators see that effect quality is being reduced to hold the frame rate.
+    hud.set("lod", effects_governor.describe() if effects_governor.level > 0 else None)
+    hud.set("mode", mode.upper())
+    hud.draw(display)
+    if recorder is not None and recorder.due():
+        recorder.capture(display.capture(), frame)
+    display.present()
+
+    # --- Adapt effects level of detail to the measured frame time ---
+    if effects_governor.record_frame(time.perf_counter() - frame_start - capture_wait - tracking_time):
+        telemetry.record_event("lod", effects_governor.level, score)
 
 # ----------------------------
 # Game Over Screen
 # ----------------------------
-screen.fill((0, 0, 0))
+display.clear((0, 0, 0))
 game_over_text = font.render("Game Over!", True, (255, 0, 0))
 final_score_text = font.render(f"Final Score: {score}", True, (255, 255, 255))
-screen.blit(game_over_text, (screen_width // 2 - game_over_text.get_width() // 2, screen_height // 2 - 50))
-screen.blit(final_score_text, (screen_width // 2 - final_score_text.get_width() // 2, screen_height // 2))
-pygame.display.flip()
+display.blit(game_over_text, (screen_width // 2 - game_over_text.get_width() // 2, screen_height // 2 - 50))
+display.blit(final_score_text, (screen_width // 2 - final_score_text.get_width() // 2, screen_height // 2))
+display.present()
 pygame.time.delay(3000)
 # ----------------------------
 # Cleanup
 # ----------------------------
+telemetry.close(score, end_reason)
+if replay_log is not None:
+    print("Replay saved to", replay_log.close())
+if recorder is not None:
+    print("Recording saved to", recorder.stop())
 cap.release()
 pygame.quit()
+trackers.close()
 hands.close()
 face_mesh.close()
\ No newline at end of file
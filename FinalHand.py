@@ -6,15 +6,41 @@ import numpy as np
 import time
 import random
 import math
+import os
+import collections
+import tuner
+from recorder import GameplayRecorder
+from telemetry import TelemetryStore
+import governor
+from trail import BladeTrail
+import replay
+from motion import MotionDetector
+import render
+from hud import HUD
+# ----------------------------
+# OpenCV Video Capture Setup
+# ----------------------------
+cap = cv2.VideoCapture(0)
+if not cap.isOpened():
+    raise RuntimeError("Unable to access the webcam.")
+
 # ----------------------------
 # MediaPipe Hand Tracking Setup
 # ----------------------------
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,      # continuous video stream
-    max_num_hands=1,              # detect one hand at most
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.5)
+
+def build_hands(model_complexity):
+    return mp_hands.Hands(
+        static_image_mode=False,      # continuous video stream
+        max_num_hands=1,              # detect one hand at most
+        model_complexity=model_complexity,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.5)
+
+# Model complexity and inference resolution are benchmarked once per machine and cached.
+hand_tuning = tuner.load_or_calibrate("hand", cap, build_hands, tuner.read_hand_landmark,
+                                      complexities=(0, 1))
+hands = build_hands(hand_tuning["model_complexity"])
 mp_drawing = mp.solutions.drawing_utils
 # ----------------------------
 # PyGame Setup (Full Screen)
@@ -22,12 +48,29 @@ mp_drawing = mp.solutions.drawing_utils
 pygame.init()
 pygame.mixer.init()  # initialize the mixer for sound effects
 
-# Get the full screen resolution.
-screen_width, screen_height = pygame.display.Info().current_w, pygame.display.Info().current_h
-screen = pygame.display.set_mode((screen_width, screen_height), pygame.FULLSCREEN)
-pygame.display.set_caption("Fruit Ninja: Hand as Cursor")
+# Internal render resolution. All game coordinates (spawn bounds, cursor mapping,
+# HUD layout) live in this logical space and SDL upscales the finished frame to the
+# display, so per-pixel cost no longer depends on the monitor. Set to None to render
+# at the native display resolution instead.
+RENDER_RESOLUTION = (1280, 720)
+# "surface" draws in software onto the display surface. "texture" uses the SDL2 GPU
+# renderer with cached sprite textures, and falls back to "surface" where unavailable.
+RENDER_BACKEND = "surface"
+
+if RENDER_RESOLUTION is not None:
+    screen_width, screen_height = RENDER_RESOLUTION
+else:
+    screen_width, screen_height = pygame.display.Info().current_w, pygame.display.Info().current_h
+display = render.create_display(RENDER_BACKEND, (screen_width, screen_height), "Fruit Ninja: Hand as Cursor",
+                                scaled=RENDER_RESOLUTION is not None)
 clock = pygame.time.Clock()
-font = pygame.font.Font(None, 36)
+font = pygame.font.Font(None, 36)  # shared by the HUD, the idle prompt and the game-over screen
+
+# Each HUD element keeps its font.render() surface and re-renders only when its value changes.
+hud = HUD(font)
+hud.add("score", (10, 10), template="Score: {}")
+hud.add("time", (screen_width - 150, 10), template="Time: {}")
+hud.add("lod", (10, screen_height - 40), color=(255, 165, 0))
 
 # Load sounds (ensure these files exist or update with correct paths)
 try:
@@ -39,21 +82,56 @@ except Exception as e:
     bomb_sound = None
 
 # ----------------------------
-# Game Timer Setup
+# Gameplay Recording Setup (press R to start/stop)
+# ----------------------------
+RECORD_FPS = 30
+RECORD_WITH_CAMERA = False  # put the camera view side by side with the game
+recorder = None
+
+# ----------------------------
+# Game Timer and RNG Setup
 # ----------------------------
 GAME_DURATION = 60  # seconds
-start_time = time.time()
+# The game clock advances by each frame's dt, and all gameplay randomness comes from
+# game_rng, so a session can be replayed exactly from its seed and per-frame inputs.
+game_time = 0.0
+GAME_SEED = None  # set to an int to play the same fruit sequence every time
+game_seed = GAME_SEED if GAME_SEED is not None else random.randrange(2 ** 32)
+game_rng = random.Random(game_seed)
+
+# ----------------------------
+# Replay Recording Setup (replays/*.fnr, watch with replay.py)
+# ----------------------------
+RECORD_REPLAYS = True
+
+# ----------------------------
+# Idle/Attract Mode Setup
+# ----------------------------
+# With no hand detected for IDLE_AFTER seconds the game pauses, renders at IDLE_FPS and
+# swaps MediaPipe for a cheap frame-difference motion detector until someone moves.
+IDLE_AFTER = 10  # seconds
+IDLE_FPS = 10
+idle = False
+motion_detector = MotionDetector()
+attract_background = None  # dimmed game scene, rendered once per idle period
+
+# ----------------------------
+# Session Telemetry Setup (slices, bomb hits and frame timing go to a local SQLite db)
+# ----------------------------
+telemetry = TelemetryStore(os.path.basename(__file__))
+end_reason = "quit"
 
 # ----------------------------
 # Slicing Animation Class
 # ----------------------------
 class SlicingAnimation:
-    def __init__(self, pos, color, duration=0.3, max_radius=50):
+    def __init__(self, pos, color, duration=0.3, max_radius=50, quality="high"):
         self.pos = pos
         self.color = color
         self.duration = duration
         self.timer = duration
         self.max_radius = max_radius
+        self.quality = quality
 
     def update(self, dt):
         self.timer -= dt
@@ -62,6 +140,11 @@ class SlicingAnimation:
         progress = 1 - (self.timer / self.duration)
         radius = int(progress * self.max_radius)
         alpha = max(255 - int(progress * 255), 0)
+        if self.quality == "low":
+            # Cheap version: an expanding ring drawn straight onto the target, no alpha surface.
+            if radius > 2:
+                pygame.draw.circle(surface, self.color, self.pos, radius, 2)
+            return
         temp_surf = pygame.Surface((self.max_radius * 2, self.max_radius * 2), pygame.SRCALPHA)
         pygame.gfxdraw.aacircle(temp_surf, self.max_radius, self.max_radius, radius, self.color + (alpha,))
         pygame.gfxdraw.filled_circle(temp_surf, self.max_radius, self.max_radius, radius, self.color + (alpha,))
@@ -82,14 +165,14 @@ class SplashEffect:
         self.timer = duration
         self.particles = []
         for _ in range(num_particles):
-            angle = random.uniform(0, 2 * math.pi)
-            speed = random.uniform(50, 200)
+            angle = game_rng.uniform(0, 2 * math.pi)
+            speed = game_rng.uniform(50, 200)
             vx = speed * math.cos(angle)
             vy = speed * math.sin(angle)
             self.particles.append({
                 'pos': [pos[0], pos[1]],
                 'vel': [vx, vy],
-                'radius': random.randint(2, 5)
+                'radius': game_rng.randint(2, 5)
             })
 
     def update(self, dt):
@@ -130,16 +213,16 @@ def smooth_polygon(points, iterations=2):
 # ----------------------------
 # Utility: Create an Irregular, Amoeba-like Water Splash Surface
 # ----------------------------
-def create_water_splash_surface(size, color, irregularity=0.2, layers=5):
+def create_water_splash_surface(size, color, irregularity=0.2, layers=5, rng=random):
     # Increase canvas size to avoid droplet cutoff.
     padded_size = int(size * 1.5)
     surf = pygame.Surface((padded_size, padded_size), pygame.SRCALPHA)
     center = padded_size / 2
-    num_points = random.randint(8, 12)
+    num_points = rng.randint(8, 12)
     base_points = []
     for i in range(num_points):
-        angle = 2 * math.pi * i / num_points + random.uniform(-irregularity, irregularity)
-        r = center * random.uniform(0.7, 1.0)
+        angle = 2 * math.pi * i / num_points + rng.uniform(-irregularity, irregularity)
+        r = center * rng.uniform(0.7, 1.0)
         x = center + r * math.cos(angle)
         y = center + r * math.sin(angle)
         base_points.append((x, y))
@@ -151,12 +234,12 @@ def create_water_splash_surface(size, color, irregularity=0.2, layers=5):
         pygame.draw.polygon(surf, color[:3] + (alpha,), points)
     # Add extra random splatter noise around the main splash.
     for _ in range(15):
-        angle = random.uniform(0, 2 * math.pi)
-        r = center + random.uniform(0, center * 0.4)
+        angle = rng.uniform(0, 2 * math.pi)
+        r = center + rng.uniform(0, center * 0.4)
         x = center + r * math.cos(angle)
         y = center + r * math.sin(angle)
-        splatter_radius = random.randint(2, 5)
-        splatter_alpha = random.randint(50, 100)
+        splatter_radius = rng.randint(2, 5)
+        splatter_alpha = rng.randint(50, 100)
         pygame.draw.circle(surf, color[:3] + (splatter_alpha,), (int(x), int(y)), splatter_radius)
     return surf
 
@@ -170,8 +253,23 @@ class Stain:
         self.duration = duration
         self.timer = duration
         self.size = size
+        # The splash shape has its own seed so snapshots can rebuild it instead of storing pixels.
+        self.seed = game_rng.getrandbits(32)
+        self.image = self.create_image()
+
+    def create_image(self):
         # Create a water-splash surface on a padded canvas.
-        self.image = create_water_splash_surface(self.size, color, irregularity=0.2, layers=5)
+        return create_water_splash_surface(self.size, self.color, irregularity=0.2, layers=5,
+                                           rng=random.Random(self.seed))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["image"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.image = self.create_image()
 
     def update(self, dt):
         self.timer -= dt
@@ -186,6 +284,9 @@ class Stain:
     def is_finished(self):
         return self.timer <= 0
 
+# Effects level of detail: scaled down when frames run over budget.
+effects_governor = governor.EffectsGovernor()
+
 # Lists to hold active animations, splash effects, and stains.
 slicing_animations = []
 splash_effects = []
@@ -194,11 +295,15 @@ stains = []  # persistent background water splash stains
 # ----------------------------
 # Fruit Class Definition
 # ----------------------------
+# Past positions kept per fruit for lag-compensated hit testing (~200 ms at 60 fps).
+FRUIT_HISTORY_LENGTH = 12
+
 class Fruit:
     def __init__(self, pos, velocity, fruit_type):
         self.pos = list(pos)         # [x, y]
         self.velocity = list(velocity)  # [vx, vy]
         self.type = fruit_type
+        self.history = collections.deque(maxlen=FRUIT_HISTORY_LENGTH)  # (time, x, y) ring buffer
         if self.type == "fruit":
             base_radius = 20
             self.color = (255, 0, 0)  # red for apple
@@ -220,7 +325,7 @@ class Fruit:
             self.fuse_color = (255, 140, 0)  # orange fuse
 
         # Increase fruit size further.
-        scale_factor = random.uniform(1.5, 1.8)
+        scale_factor = game_rng.uniform(1.5, 1.8)
         self.radius = int(base_radius * scale_factor)
         if self.type == "watermelon":
             self.seeds = [(int(dx * scale_factor), int(dy * scale_factor)) for dx, dy in self.seeds]
@@ -230,6 +335,23 @@ class Fruit:
         self.pos[1] += self.velocity[1] * dt
         self.velocity[1] += 300 * dt  # gravity
 
+    def record_position(self, t):
+        self.history.append((t, self.pos[0], self.pos[1]))
+
+    def position_at(self, t):
+        # Rewind the fruit to time t, interpolating between recorded frames. Times older
+        # than the history are clamped to the oldest recorded position.
+        if not self.history or t >= self.history[-1][0]:
+            return self.pos[0], self.pos[1]
+        newer = None
+        for sample in reversed(self.history):
+            if sample[0] <= t:
+                f = (t - sample[0]) / (newer[0] - sample[0])
+                return (sample[1] + (newer[1] - sample[1]) * f,
+                        sample[2] + (newer[2] - sample[2]) * f)
+            newer = sample
+        return newer[1], newer[2]
+
     def draw(self, surface):
         if self.type == "banana":
             x, y = int(self.pos[0]), int(self.pos[1])
@@ -265,10 +387,10 @@ class Fruit:
             pygame.draw.circle(surface, (255, 255, 0), fuse_end, 4)
 
 def spawn_fruit(elapsed_time):
-    x = random.randint(50, screen_width - 50)
+    x = game_rng.randint(50, screen_width - 50)
     y = screen_height + 30  # start below screen
-    vx = random.uniform(-100, 100)
-    vy = random.uniform(-700, -400)  # randomized upward velocity
+    vx = game_rng.uniform(-100, 100)
+    vy = game_rng.uniform(-700, -400)  # randomized upward velocity
     # Dynamically adjust bomb probability:
     # Bomb chance increases from 0.1 to 0.2 over the game duration.
     bomb_probability = 0.2 + 0.1 * (elapsed_time / GAME_DURATION)
@@ -277,7 +399,7 @@ def spawn_fruit(elapsed_time):
     banana_prob = 0.15
     # Watermelon chance is reduced accordingly.
     watermelon_prob = 0.15 - (bomb_probability - 0.1)
-    r = random.random()
+    r = game_rng.random()
     if r < apple_prob:
         fruit_type = "fruit"  # apple
     elif r < apple_prob + banana_prob:
@@ -289,19 +411,13 @@ def spawn_fruit(elapsed_time):
     return Fruit((x, y), (vx, vy), fruit_type)
 
 fruits = []
-last_spawn_time = time.time()
+last_spawn_time = 0.0
 score = 0
 game_over = False
 
-# ----------------------------
-# OpenCV Video Capture Setup
-# ----------------------------
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    raise RuntimeError("Unable to access the webcam.")
-
 def get_index_finger_tip(frame):
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    small = tuner.resize_for_inference(frame, hand_tuning["input_width"])
+    frame_rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
     results = hands.process(frame_rgb)
     if results.multi_hand_landmarks:
         hand_landmarks = results.multi_hand_landmarks[0]
@@ -312,76 +428,40 @@ def get_index_finger_tip(frame):
     return None
 
 # ----------------------------
-# Variable for Smoothed Cursor
-# ----------------------------
-smoothed_cursor = None  # will store the smoothed cursor position
-# ----------------------------
-# Main Game Loop
+# Game Update (one simulation step, also driven by the replay viewer)
 # ----------------------------
-running = True
-while running:
-    dt = clock.tick(60) / 1000.0  # seconds per frame
-    
-    # Check for quit events (including ESC key)
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-        elif event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
-                running = False
-
-    if game_over:
-        running = False
-
-    elapsed_time = time.time() - start_time
-    remaining_time = max(0, int(GAME_DURATION - elapsed_time))
-    if remaining_time <= 0:
-        running = False
-
-    # Capture frame from webcam.
-    ret, frame = cap.read()
-    if not ret:
-        continue
-    frame = cv2.flip(frame, 1)  # mirror view
-
-    # --- Hand Tracking with Increased Detection Area ---
-    finger_pos = get_index_finger_tip(frame)
-    if finger_pos is not None:
-        cam_h, cam_w, _ = frame.shape
-        scale = 1.2
-        center_x = cam_w / 2
-        center_y = cam_h / 2
-        new_x = int(((finger_pos[0] - center_x) * scale + center_x) * screen_width / cam_w)
-        new_y = int(((finger_pos[1] - center_y) * scale + center_y) * screen_height / cam_h)
-        cursor_pos = (new_x, new_y)
-    else:
-        cursor_pos = None
-
-    # --- Smooth the Cursor (update only if new detection is available) ---
-    if cursor_pos is not None:
-        if smoothed_cursor is None:
-            smoothed_cursor = cursor_pos
-        else:
-            smoothed_cursor = (int(smoothed_cursor[0] * 0.8 + cursor_pos[0] * 0.2),
-                               int(smoothed_cursor[1] * 0.8 + cursor_pos[1] * 0.2))
-    # If no new detection, smoothed_cursor remains unchanged.
+def update_game(dt, cursors):
+    # cursors: list of ((x, y), age) where age is how many seconds before this frame
+    # the camera frame behind the cursor sample was captured.
+    global game_time, last_spawn_time, fruits, slicing_animations, splash_effects, stains
+    global score, game_over, end_reason
+    game_time += dt
 
     # --- Gradually Increase Spawn Rate ---
-    current_spawn_interval = max(2.0 - (elapsed_time / GAME_DURATION) * 1.5, 0.5)
-    current_time = time.time()
-    if current_time - last_spawn_time > current_spawn_interval:
-        fruits.append(spawn_fruit(elapsed_time))
-        last_spawn_time = current_time
+    current_spawn_interval = max(2.0 - (game_time / GAME_DURATION) * 1.5, 0.5)
+    if game_time - last_spawn_time > current_spawn_interval:
+        fruits.append(spawn_fruit(game_time))
+        last_spawn_time = game_time
 
     # --- Update fruits ---
     for fruit in fruits:
         fruit.update(dt)
-    fruits = [fruit for fruit in fruits if fruit.pos[1] < screen_height + 50]
+        fruit.record_position(game_time)
+    # Keep a fruit until its oldest recorded position is off screen too, so lag-compensated
+    # hit tests can still reach it while the camera frame behind the cursor showed it.
+    fruits = [fruit for fruit in fruits if fruit.history[0][2] < screen_height + 50]
 
     # --- Check collisions (slicing) ---
+    # A cursor sample older than the fruit history means tracking lost the hand and the
+    # cursor stays where it was last seen, so it is tested where fruits are now.
+    cursors = [(pos, age if age <= FRUIT_HISTORY_LENGTH / 60 else 0.0) for pos, age in cursors]
     for fruit in fruits[:]:
-        if smoothed_cursor is not None:
-            dist = np.hypot(fruit.pos[0] - smoothed_cursor[0], fruit.pos[1] - smoothed_cursor[1])
+        if cursors:
+            # Lag compensation: test the cursor against where the fruit was when the
+            # camera frame behind the cursor was captured, not where it is now.
+            (cursor_x, cursor_y), cursor_age = cursors[0]
+            hit_x, hit_y = fruit.position_at(game_time - cursor_age)
+            dist = np.hypot(hit_x - cursor_x, hit_y - cursor_y)
             if dist < fruit.radius:
                 if fruit.type == "bomb":
                     anim_color = (255, 0, 0)
@@ -391,7 +471,9 @@ while running:
                     anim_color = (0, 255, 0)
                 else:
                     anim_color = (255, 0, 0)
-                slicing_animations.append(SlicingAnimation((int(fruit.pos[0]), int(fruit.pos[1])), anim_color))
+                fx = effects_governor.settings
+                slicing_animations.append(SlicingAnimation((int(fruit.pos[0]), int(fruit.pos[1])), anim_color,
+                                                           quality=fx["animation_quality"]))
                 if fruit.type != "bomb":
                     if fruit.type == "banana":
                         splash_color = (255, 255, 0)
@@ -399,13 +481,17 @@ while running:
                         splash_color = (0, 255, 0)
                     else:
                         splash_color = (255, 0, 0)
-                    splash_effects.append(SplashEffect((int(fruit.pos[0]), int(fruit.pos[1])), splash_color))
-                    stains.append(Stain((int(fruit.pos[0]), int(fruit.pos[1])), splash_color, duration=10, size=random.randint(50,80)))
+                    splash_effects.append(SplashEffect((int(fruit.pos[0]), int(fruit.pos[1])), splash_color,
+                                                       num_particles=fx["particles"]))
+                    stains.append(Stain((int(fruit.pos[0]), int(fruit.pos[1])), splash_color, duration=fx["stain_duration"],
+                                        size=int(game_rng.randint(50,80) * fx["stain_scale"])))
                 if fruit.type == "bomb":
                     if bomb_sound:
                         bomb_sound.play()
-                    print("Bomb sliced! Game over.")
+                    if telemetry is not None:
+                        telemetry.record_bomb(score)
                     game_over = True
+                    end_reason = "bomb"
                     fruits.remove(fruit)
                     break
                 else:
@@ -414,13 +500,17 @@ while running:
                     fruits.remove(fruit)
                     if fruit.type == "banana":
                         score += 2
-                        print("Banana sliced! Score:", score)
                     elif fruit.type == "watermelon":
                         score += 3
-                        print("Watermelon sliced! Score:", score)
                     else:
                         score += 1
-                        print("Apple sliced! Score:", score)
+                    if telemetry is not None:
+                        telemetry.record_slice(fruit.type, score)
+
+    # --- Enforce global effect caps for the current level of detail ---
+    governor.trim(slicing_animations, effects_governor.settings["max_animations"])
+    governor.trim(splash_effects, effects_governor.settings["max_splashes"])
+    governor.trim(stains, effects_governor.settings["max_stains"])
 
     # --- Update slicing animations ---
     for anim in slicing_animations:
@@ -437,41 +527,218 @@ while running:
         stain.update(dt)
     stains = [stain for stain in stains if not stain.is_finished()]
 
-    # --- Render the game scene ---
-    screen.fill((54, 39, 18))  # dark background
+def draw_game(display):
+    display.clear((54, 39, 18))  # dark background
     num_lines = 10
     for i in range(1, num_lines):
         x = int(i * screen_width / num_lines)
-        pygame.draw.line(screen, (154, 123, 79), (x, 0), (x, screen_height), 1)
+        display.line((154, 123, 79), (x, 0), (x, screen_height))
     for stain in stains:
-        stain.draw(screen)
+        display.draw_stain(stain)
     for fruit in fruits:
-        fruit.draw(screen)
+        display.draw_fruit(fruit)
     for anim in slicing_animations:
-        anim.draw(screen)
+        display.draw_slicing_animation(anim)
     for splash in splash_effects:
-        splash.draw(screen)
+        display.draw_splash(splash)
+
+def render_attract_background(display):
+    # The game is paused while idle, so the dimmed scene is rendered once and reused.
+    draw_game(display)
+    background = display.capture().copy()
+    shade = pygame.Surface((screen_width, screen_height), pygame.SRCALPHA)
+    shade.fill((0, 0, 0, 160))
+    background.blit(shade, (0, 0))
+    return display.prepare(background)
+
+def draw_attract_screen(display, background, now):
+    display.blit(background, (0, 0))
+    # Pulse the prompt so the kiosk still looks alive at the idle frame rate.
+    brightness = int(155 + 100 * abs(math.sin(now * 2)))
+    prompt = font.render("Wave your hand to play!", True, (brightness, brightness, brightness))
+    display.blit(prompt, (screen_width // 2 - prompt.get_width() // 2, screen_height // 2 - prompt.get_height() // 2))
+
+# ----------------------------
+# Game State Snapshots (replay keyframes)
+# ----------------------------
+def snapshot_game():
+    return {
+        "game_time": game_time,
+        "last_spawn_time": last_spawn_time,
+        "score": score,
+        "game_over": game_over,
+        "end_reason": end_reason,
+        "fruits": fruits,
+        "slicing_animations": slicing_animations,
+        "splash_effects": splash_effects,
+        "stains": stains,
+        "rng_state": game_rng.getstate(),
+    }
+
+def restore_game(state):
+    global game_time, last_spawn_time, fruits, slicing_animations, splash_effects, stains
+    global score, game_over, end_reason
+    game_time = state["game_time"]
+    last_spawn_time = state["last_spawn_time"]
+    score = state["score"]
+    game_over = state["game_over"]
+    end_reason = state["end_reason"]
+    fruits = state["fruits"]
+    slicing_animations = state["slicing_animations"]
+    splash_effects = state["splash_effects"]
+    stains = state["stains"]
+    game_rng.setstate(state["rng_state"])
+
+# ----------------------------
+# Variable for Smoothed Cursor
+# ----------------------------
+smoothed_cursor = None  # will store the smoothed cursor position
+blade_trail = BladeTrail()  # recent cursor samples, drawn as the swipe path
+cursor_capture_time = None  # capture time of the camera frame behind the latest cursor sample
+last_detection_time = time.time()  # drives idle mode
+
+replay_log = None
+if RECORD_REPLAYS:
+    replay_log = replay.ReplayWriter({"script": os.path.basename(__file__), "seed": game_seed,
+                                      "screen_size": [screen_width, screen_height]})
+# ----------------------------
+# Main Game Loop
+# ----------------------------
+running = True
+while running:
+    dt_ms = clock.tick(IDLE_FPS if idle else 60)
+    dt = dt_ms / 1000.0  # seconds per frame
+    frame_start = time.perf_counter()
+    
+    # Check for quit events (including ESC key)
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            running = False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                running = False
+            elif event.key == pygame.K_r:
+                # Start or stop recording gameplay to a video file
+                if recorder is None:
+                    recorder = GameplayRecorder((screen_width, screen_height), fps=RECORD_FPS,
+                                                include_camera=RECORD_WITH_CAMERA)
+                else:
+                    print("Recording saved to", recorder.stop())
+                    recorder = None
+
+    if game_over:
+        running = False
+
+    remaining_time = max(0, int(GAME_DURATION - game_time))
+    if remaining_time <= 0:
+        running = False
+        end_reason = "time"
+
+    # Capture frame from webcam.
+    capture_start = time.perf_counter()
+    ret, frame = cap.read()
+    capture_wait = time.perf_counter() - capture_start  # not counted against the frame budget
+    if not ret:
+        continue
+    capture_time = time.time()
+    frame = cv2.flip(frame, 1)  # mirror view
+
+    # --- Idle/Attract Mode: motion detection only, game paused ---
+    if idle:
+        if not motion_detector.detect(frame):
+            if attract_background is None:
+                attract_background = render_attract_background(display)
+            draw_attract_screen(display, attract_background, capture_time)
+            display.present()
+            continue
+        # Someone moved: resume full tracking on this same frame.
+        idle = False
+        attract_background = None
+        last_detection_time = capture_time
+        telemetry.record_event("idle", "end", score)
+
+    # --- Hand Tracking with Increased Detection Area ---
+    tracking_start = time.perf_counter()
+    finger_pos = get_index_finger_tip(frame)
+    tracking_time = time.perf_counter() - tracking_start  # inference is not an effect cost either
+    if finger_pos is not None:
+        last_detection_time = capture_time
+    elif capture_time - last_detection_time > IDLE_AFTER:
+        idle = True
+        motion_detector.reset()
+        smoothed_cursor = None
+        telemetry.record_event("idle", "start", score)
+    if finger_pos is not None:
+        cam_h, cam_w, _ = frame.shape
+        scale = 1.2
+        center_x = cam_w / 2
+        center_y = cam_h / 2
+        new_x = int(((finger_pos[0] - center_x) * scale + center_x) * screen_width / cam_w)
+        new_y = int(((finger_pos[1] - center_y) * scale + center_y) * screen_height / cam_h)
+        cursor_pos = (new_x, new_y)
+    else:
+        cursor_pos = None
+
+    # --- Smooth the Cursor (update only if new detection is available) ---
+    if cursor_pos is not None:
+        cursor_capture_time = capture_time
+        if smoothed_cursor is None:
+            smoothed_cursor = cursor_pos
+        else:
+            smoothed_cursor = (int(smoothed_cursor[0] * 0.8 + cursor_pos[0] * 0.2),
+                               int(smoothed_cursor[1] * 0.8 + cursor_pos[1] * 0.2))
+        blade_trail.add(capture_time, smoothed_cursor)
+    # If no new detection, smoothed_cursor remains unchanged.
+    telemetry.record_frame(dt, time.time() - capture_time)
+
+    # --- Advance the game (each step is logged first so it can be replayed) ---
+    cursors = []
+    if smoothed_cursor is not None:
+        cursors.append((smoothed_cursor, replay.cursor_age_ms(cursor_capture_time, time.time())))
+    if replay_log is not None:
+        if replay_log.needs_keyframe():
+            replay_log.write_keyframe(snapshot_game())
+        replay_log.write_frame(dt_ms, effects_governor.level, cursors)
+    update_game(dt, [(pos, age_ms / 1000) for pos, age_ms in cursors])
+
+    # --- Render the game scene ---
+    draw_game(display)
+    display.draw_trail(blade_trail, time.time())
     if smoothed_cursor is not None:
-        pygame.draw.circle(screen, (255, 255, 255), smoothed_cursor, 5)
-    score_surface = font.render(f"Score: {score}", True, (255, 255, 255))
-    screen.blit(score_surface, (10, 10))
-    timer_surface = font.render(f"Time: {remaining_time}", True, (255, 255, 255))
-    screen.blit(timer_surface, (screen_width - 150, 10))
-    pygame.display.flip()
+        display.circle((255, 255, 255), smoothed_cursor, 5)
+    hud.set("score", score)
+    hud.set("time", remaining_time)
+    if recorder is not None:
+        display.circle((255, 0, 0), (screen_width // 2, 22), 8)
+    # Let operators see that effect quality is being reduced to hold the frame rate.
+    hud.set("lod", effects_governor.describe() if effects_governor.level > 0 else None)
+    hud.draw(display)
+    if recorder is not None and recorder.due():
+        recorder.capture(display.capture(), frame)
+    display.present()
+
+    # --- Adapt effects level of detail to the measured frame time ---
+    if effects_governor.record_frame(time.perf_counter() - frame_start - capture_wait - tracking_time):
+        telemetry.record_event("lod", effects_governor.level, score)
 
 # ----------------------------
 # Game Over Screen
 # ----------------------------
-screen.fill((0, 0, 0))
+display.clear((0, 0, 0))
 game_over_text = font.render("Game Over!", True, (255, 0, 0))
 final_score_text = font.render(f"Final Score: {score}", True, (255, 255, 255))
-screen.blit(game_over_text, (screen_width // 2 - game_over_text.get_width() // 2, screen_height // 2 - 50))
-screen.blit(final_score_text, (screen_width // 2 - final_score_text.get_width() // 2, screen_height // 2))
-pygame.display.flip()
+display.blit(game_over_text, (screen_width // 2 - game_over_text.get_width() // 2, screen_height // 2 - 50))
+display.blit(final_score_text, (screen_width // 2 - final_score_text.get_width() // 2, screen_height // 2))
+display.present()
 pygame.time.delay(3000)  # display for 3 seconds
 # ----------------------------
 # Cleanup
 # ----------------------------
+telemetry.close(score, end_reason)
+if replay_log is not None:
+    print("Replay saved to", replay_log.close())
+if recorder is not None:
+    print("Recording saved to", recorder.stop())
 cap.release()
 pygame.quit()
 hands.close()
\ No newline at end of file
@@ -0,0 +1,267 @@
+# Microbenchmarks for the rendering and effects hot paths.
+#
+# Runs headless on SDL's dummy video driver and times the real classes and functions
+# from a game script at a realistic and a stress-level object count, together with
+# the peak Python memory allocated per frame. Drawing cases run once per display
+# backend (see render.py). Results are saved as JSON so a later run can be compared
+# against them:
+#
+#   python benchmarks/bench_hotpaths.py run --output benchmarks/baseline.json
+#   python benchmarks/bench_hotpaths.py run --baseline benchmarks/baseline.json
+#   python benchmarks/bench_hotpaths.py run --backend surface --backend texture
+#   python benchmarks/bench_hotpaths.py compare benchmarks/baseline.json current.json
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# SDL queues renderer draw calls until present(); run them immediately so the texture
+# backend's cost lands in the timed step like the surface backend's does.
+os.environ.setdefault("SDL_RENDER_BATCHING", "0")
+
+import pygame
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from game_defs import load_definitions
+import render
+
+SCREEN_SIZE = (1280, 720)
+DT = 1 / 60
+FRUIT_TYPES = ["fruit", "banana", "watermelon", "bomb"]
+DEFAULT_THRESHOLD = 0.10  # flag regressions more than 10% slower than the baseline
+
+# ----------------------------
+# Benchmark Cases
+# ----------------------------
+# Each case builds its objects once per cycle (untimed) and returns a step function
+# that is timed once per frame. Counts are (realistic, stress) objects per frame.
+# Drawing goes through the display backend under test.
+def random_pos():
+    return (random.randint(50, SCREEN_SIZE[0] - 50), random.randint(50, SCREEN_SIZE[1] - 50))
+
+def case_smooth_polygon(game, display, count):
+    polygons = [[(random.uniform(0, 100), random.uniform(0, 100)) for _ in range(random.randint(8, 12))]
+                for _ in range(count)]
+    def step():
+        for points in polygons:
+            game["smooth_polygon"](points, iterations=2)
+    return step
+
+def case_water_splash_surface(game, display, count):
+    def step():
+        for _ in range(count):
+            game["create_water_splash_surface"](random.randint(50, 80), (255, 0, 0), irregularity=0.2, layers=5)
+    return step
+
+def case_fruit_draw(game, display, count):
+    fruits = [game["Fruit"](random_pos(), (0, 0), FRUIT_TYPES[i % len(FRUIT_TYPES)]) for i in range(count)]
+    def step():
+        for fruit in fruits:
+            display.draw_fruit(fruit)
+    return step
+
+def case_splash_effect(game, display, count):
+    splashes = [game["SplashEffect"](random_pos(), (255, 255, 0)) for _ in range(count)]
+    def step():
+        for splash in splashes:
+            splash.update(DT)
+        for splash in splashes:
+            display.draw_splash(splash)
+    return step
+
+def case_slicing_animation(game, display, count):
+    anims = [game["SlicingAnimation"](random_pos(), (255, 0, 0)) for _ in range(count)]
+    for anim in anims:
+        anim.update(random.uniform(0, anim.duration))
+    def step():
+        for anim in anims:
+            display.draw_slicing_animation(anim)
+    return step
+
+def case_stain_draw(game, display, count):
+    stains = [game["Stain"](random_pos(), (0, 255, 0), duration=10, size=random.randint(50, 80))
+              for _ in range(count)]
+    for stain in stains:
+        stain.update(random.uniform(0, stain.duration))
+    def step():
+        for stain in stains:
+            display.draw_stain(stain)
+    return step
+
+def case_blade_trail(game, display, count):
+    trails = [game["BladeTrail"]() for _ in range(count)]
+    clock = [0.0]
+    def step():
+        clock[0] += DT
+        for trail in trails:
+            trail.add(clock[0], random_pos())
+            display.draw_trail(trail, clock[0])
+    return step
+
+def case_hud(game, display, count):
+    hud = game["HUD"](pygame.font.Font(None, 36))
+    for i in range(count):
+        hud.add(i, (10 + 300 * (i % 4), 10 + 40 * (i // 4)), template="Score: {}")
+    frame = [0]
+    def step():
+        frame[0] += 1
+        for i in range(count):
+            hud.set(i, frame[0] // 60 + i)  # values change about once a second, like the timer
+        hud.draw(display)
+    return step
+
+# name: (builder, (realistic count, stress count), frames before the objects are rebuilt,
+#        whether the case draws and so runs once per backend)
+CASES = {
+    "smooth_polygon": (case_smooth_polygon, (1, 20), None, False),
+    "create_water_splash_surface": (case_water_splash_surface, (1, 10), None, False),
+    "Fruit.draw": (case_fruit_draw, (6, 60), None, True),
+    "SplashEffect.update+draw": (case_splash_effect, (3, 40), 20, True),  # splashes live ~30 frames
+    "SlicingAnimation.draw": (case_slicing_animation, (3, 40), None, True),
+    "Stain.draw": (case_stain_draw, (8, 60), None, True),
+    "BladeTrail.add+draw": (case_blade_trail, (1, 8), None, True),
+    "HUD.set+draw": (case_hud, (3, 12), None, True),
+}
+BACKENDS = ["surface", "texture"]
+
+# ----------------------------
+# Runner
+# ----------------------------
+def time_case(build, rebuild_every, frames):
+    times = []
+    step = build()
+    for i in range(frames):
+        if rebuild_every and i and i % rebuild_every == 0:
+            step = build()
+        t0 = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - t0)
+    return times
+
+def measure_allocations(build, rebuild_every, frames):
+    # tracemalloc only sees Python-level allocations, not SDL pixel buffers.
+    peaks = []
+    step = build()
+    tracemalloc.start()
+    try:
+        for i in range(frames):
+            if rebuild_every and i and i % rebuild_every == 0:
+                step = build()
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            step()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def run_benchmarks(script, frames, seed, selected=None, backends=("surface",)):
+    pygame.init()
+    game = load_definitions(script, screen_width=SCREEN_SIZE[0], screen_height=SCREEN_SIZE[1], game_rng=random)
+    results = {}
+    for backend in backends:
+        display = render.create_display(backend, SCREEN_SIZE, "Benchmarks", scaled=False, fullscreen=False)
+        if display.name != backend:
+            print(f"Skipping the {backend} backend: not available here")
+            continue
+        for name, (builder, counts, rebuild_every, draws) in CASES.items():
+            if (selected and name not in selected) or (not draws and backend != backends[0]):
+                continue
+            for level, count in zip(("realistic", "stress"), counts):
+                random.seed(seed)
+                build = lambda: builder(game, display, count)
+                time_case(build, rebuild_every, min(frames, 10))  # warm-up
+                times = sorted(time_case(build, rebuild_every, frames))
+                peaks = measure_allocations(build, rebuild_every, max(frames // 5, 10))
+                # Surface results keep their original names so older baselines still compare.
+                key = f"{name}/{level}" if backend == "surface" or not draws else f"{name}/{level}/{backend}"
+                results[key] = {
+                    "count": count,
+                    "frames": frames,
+                    "backend": backend if draws else None,
+                    "median_ms": statistics.median(times) * 1000,
+                    "mean_ms": statistics.fmean(times) * 1000,
+                    "p95_ms": times[int(0.95 * (len(times) - 1))] * 1000,
+                    "alloc_peak_kb": statistics.fmean(peaks) / 1024,
+                }
+                print(f"{key:<50} {results[key]['median_ms']:9.3f} ms  {results[key]['alloc_peak_kb']:9.1f} KiB")
+    pygame.quit()
+    return {
+        "meta": {
+            "script": script,
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "frames": frames,
+            "seed": seed,
+            "backends": list(backends),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+        },
+        "results": results,
+    }
+
+def compare_results(baseline, current, threshold):
+    regressions = []
+    print(f"{'case':<50} {'baseline':>10} {'current':>10} {'change':>8}")
+    for key, base in baseline["results"].items():
+        if key not in current["results"]:
+            continue
+        now = current["results"][key]
+        change = now["median_ms"] / base["median_ms"] - 1 if base["median_ms"] > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<50} {base['median_ms']:9.3f}ms {now['median_ms']:9.3f}ms {change:+7.1%}{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rendering and effects hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmarks")
+    run.add_argument("--script", default="FinalHand.py", help="game script whose definitions are benchmarked")
+    run.add_argument("--frames", type=int, default=300, help="timed frames per case")
+    run.add_argument("--seed", type=int, default=1234)
+    run.add_argument("--case", action="append", choices=sorted(CASES), help="only run the given case(s)")
+    run.add_argument("--backend", action="append", choices=BACKENDS,
+                     help="display backend(s) to draw with (default: surface)")
+    run.add_argument("--output", help="write results to this JSON file")
+    run.add_argument("--baseline", help="compare against this JSON file after running")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare = commands.add_parser("compare", help="compare two result files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        current = run_benchmarks(args.script, args.frames, args.seed, args.case, args.backend or ["surface"])
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+
+    regressions = compare_results(baseline, current, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+# Load the classes and functions of a game script without running the game.
+#
+# The game scripts open the webcam and the display at import time, so tools such as
+# the benchmarks only execute their imports, def/class statements and constant
+# assignments. Anything else the definitions need (screen_width, ...) is passed in.
+import ast
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def _is_constant_assignment(node):
+    if not isinstance(node, ast.Assign):
+        return False
+    try:
+        ast.literal_eval(node.value)
+    except ValueError:
+        return False
+    return True
+
+def load_definitions(script="FinalHand.py", **namespace):
+    path = os.path.join(ROOT, script)
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    body = [node for node in tree.body
+            if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef))
+            or _is_constant_assignment(node)]
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    defs = {"__name__": "game_defs", "__file__": path}
+    exec(compile(ast.Module(body=body, type_ignores=[]), path, "exec"), defs)
+    # Injected values win over the script's own constants.
+    defs.update(namespace)
+    return defs
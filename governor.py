@@ -0,0 +1,60 @@
+# Frame-budget-aware level of detail for visual effects.
+#
+# The governor watches recent frame times and steps the effects level of detail down
+# when the game runs over budget and back up once there is headroom again. Separate
+# thresholds and a hold time after every change (hysteresis) keep it from flapping.
+import collections
+
+FRAME_BUDGET = 1 / 60  # seconds
+
+# Level 0 is full quality. Each level trades effect detail for frame time, and every
+# level caps how many effects of each type can be alive at once (oldest go first).
+LEVELS = [
+    {"particles": 20, "stain_duration": 10, "stain_scale": 1.0, "animation_quality": "high",
+     "max_splashes": 16, "max_stains": 40, "max_animations": 16},
+    {"particles": 12, "stain_duration": 6, "stain_scale": 0.85, "animation_quality": "high",
+     "max_splashes": 10, "max_stains": 20, "max_animations": 10},
+    {"particles": 6, "stain_duration": 3, "stain_scale": 0.7, "animation_quality": "low",
+     "max_splashes": 6, "max_stains": 10, "max_animations": 6},
+    {"particles": 3, "stain_duration": 1.5, "stain_scale": 0.5, "animation_quality": "low",
+     "max_splashes": 3, "max_stains": 4, "max_animations": 3},
+]
+
+class EffectsGovernor:
+    def __init__(self, budget=FRAME_BUDGET, window=30, degrade_above=0.9, recover_below=0.6, hold_frames=60):
+        self.budget = budget
+        self.frame_times = collections.deque(maxlen=window)
+        self.degrade_above = degrade_above    # fraction of the budget that triggers a lower level
+        self.recover_below = recover_below    # fraction of the budget needed to raise it again
+        self.hold_frames = hold_frames        # minimum frames between two changes
+        self.frames_since_change = 0
+        self.level = 0
+
+    @property
+    def settings(self):
+        return LEVELS[self.level]
+
+    def record_frame(self, frame_time):
+        # Returns True when the level of detail changed.
+        self.frame_times.append(frame_time)
+        self.frames_since_change += 1
+        if len(self.frame_times) < self.frame_times.maxlen or self.frames_since_change < self.hold_frames:
+            return False
+        average = sum(self.frame_times) / len(self.frame_times)
+        if average > self.budget * self.degrade_above and self.level < len(LEVELS) - 1:
+            self.level += 1
+        elif average < self.budget * self.recover_below and self.level > 0:
+            self.level -= 1
+        else:
+            return False
+        self.frames_since_change = 0
+        self.frame_times.clear()
+        return True
+
+    def describe(self):
+        return f"Effects LOD {self.level}/{len(LEVELS) - 1}"
+
+def trim(effects, cap):
+    # Drop the oldest effects in place so at most `cap` remain.
+    if len(effects) > cap:
+        del effects[:len(effects) - cap]
@@ -0,0 +1,44 @@
+# Cached HUD text.
+#
+# Each text element keeps the surface font.render() made for its current value and
+# only renders again when the value changes, so a frame where the score and timer are
+# unchanged renders no text and allocates no surfaces. The display backend prepares a
+# new image (a texture upload on the texture backend) only after a change, and each
+# frame just blits the prepared images.
+
+class TextElement:
+    def __init__(self, pos, color, template):
+        self.pos = pos
+        self.color = color
+        self.template = template
+        self.value = None
+        self.surface = None  # rendered text, None while hidden
+        self.image = None    # self.surface as prepared by the display backend
+
+class HUD:
+    def __init__(self, font):
+        self.font = font
+        self.elements = {}  # name -> TextElement, drawn in insertion order
+
+    def add(self, name, pos, color=(255, 255, 255), template="{}"):
+        self.elements[name] = TextElement(pos, color, template)
+
+    def set(self, name, value):
+        # A value of None hides the element.
+        element = self.elements[name]
+        if value == element.value:
+            return
+        element.value = value
+        element.image = None
+        if value is None:
+            element.surface = None
+        else:
+            element.surface = self.font.render(element.template.format(value), True, element.color)
+
+    def draw(self, display):
+        for element in self.elements.values():
+            if element.surface is None:
+                continue
+            if element.image is None:
+                element.image = display.prepare(element.surface)
+            display.blit(element.image, element.pos)
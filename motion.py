@@ -0,0 +1,34 @@
+# Cheap motion detection for the idle/attract mode.
+#
+# While nobody is playing, MediaPipe inference is replaced by a frame difference on
+# a tiny grayscale thumbnail: one resize, one absdiff and a count per frame, which
+# costs a fraction of a millisecond. Blurring the thumbnail and requiring a minimum
+# share of changed pixels keep sensor noise and lighting flicker from waking the game.
+import cv2
+import numpy as np
+
+class MotionDetector:
+    def __init__(self, width=64, pixel_threshold=25, min_changed=0.02):
+        self.width = width                      # thumbnail width in pixels
+        self.pixel_threshold = pixel_threshold  # gray-level change that counts as motion
+        self.min_changed = min_changed          # share of thumbnail pixels that must change
+        self.previous = None
+
+    def thumbnail(self, frame):
+        height = max(1, int(frame.shape[0] * self.width / frame.shape[1]))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def detect(self, frame):
+        # True when the frame differs enough from the previous one.
+        current = self.thumbnail(frame)
+        previous, self.previous = self.previous, current
+        if previous is None:
+            return False
+        changed = np.count_nonzero(cv2.absdiff(current, previous) > self.pixel_threshold)
+        return changed >= self.min_changed * current.size
+
+    def reset(self):
+        # Forget the reference frame, e.g. when idle mode starts again.
+        self.previous = None
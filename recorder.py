@@ -0,0 +1,155 @@
+# Asynchronous gameplay recording.
+#
+# The game loop only copies the finished screen's raw pixels into a pooled buffer (a
+# straight row-major memcpy); a background thread converts and encodes it with
+# cv2.VideoWriter. When every buffer is still
+# waiting to be encoded, frames are dropped according to the drop policy instead of
+# blocking the game loop.
+import collections
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+import pygame
+
+RECORDINGS_DIR = "recordings"
+
+class GameplayRecorder:
+    def __init__(self, size, fps=30, include_camera=False, pool_size=8, drop_policy="oldest", path=None):
+        # drop_policy "oldest" overwrites the oldest queued frame, "newest" skips the new one.
+        if drop_policy not in ("oldest", "newest"):
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.width, self.height = size
+        self.fps = fps
+        self.include_camera = include_camera
+        self.drop_policy = drop_policy
+        if path is None:
+            path = os.path.join(RECORDINGS_DIR, time.strftime("gameplay-%Y%m%d-%H%M%S.mp4"))
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self.free = collections.deque(np.empty((self.height, self.width, 4), np.uint8) for _ in range(pool_size))
+        self.pending = collections.deque()
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.next_capture = time.perf_counter()
+        self.frames_written = 0
+        self.frames_dropped = 0
+
+        self.writer = None
+        self.thread = threading.Thread(target=self._encode_loop, name="gameplay-recorder", daemon=True)
+        self.thread.start()
+
+    def due(self):
+        # Whether the next capture() would record a frame; lets callers skip preparing one.
+        return time.perf_counter() >= self.next_capture
+
+    def capture(self, surface, camera_frame=None):
+        # Record at the video frame rate, not the game frame rate.
+        now = time.perf_counter()
+        if now < self.next_capture:
+            return
+        self.next_capture = max(self.next_capture + 1 / self.fps, now)
+
+        with self.condition:
+            if self.free:
+                buffer = self.free.popleft()
+            elif self.drop_policy == "oldest" and self.pending:
+                buffer, _, _ = self.pending.popleft()
+                self.frames_dropped += 1
+            else:
+                self.frames_dropped += 1
+                return
+
+        conversion = self._copy_pixels(surface, buffer)
+        with self.condition:
+            self.pending.append((buffer, conversion, camera_frame if self.include_camera else None))
+            self.condition.notify()
+
+    def _copy_pixels(self, surface, buffer):
+        # Copy the surface into the buffer without reordering pixels and return the cv2
+        # conversion to BGR, which runs on the encoder thread.
+        shifts = surface.get_shifts()
+        if surface.get_bytesize() == 4 and surface.get_pitch() == self.width * 4 and shifts[3] in (0, 24):
+            # Byte offset of each channel inside a 32-bit pixel.
+            red, blue = (shift // 8 if sys.byteorder == "little" else 3 - shift // 8 for shift in shifts[::2])
+            if (red, blue) in ((2, 0), (0, 2)):
+                pixels = surface.get_buffer()
+                np.copyto(buffer, np.frombuffer(pixels, np.uint8).reshape(self.height, self.width, 4))
+                del pixels  # unlock the surface
+                return cv2.COLOR_BGRA2BGR if red == 2 else cv2.COLOR_RGBA2BGR
+        # Any other pixel format goes through pygame's converter.
+        np.copyto(buffer, np.frombuffer(pygame.image.tobytes(surface, "RGBA"), np.uint8)
+                  .reshape(self.height, self.width, 4))
+        return cv2.COLOR_RGBA2BGR
+
+    def _open_writer(self, frame_width):
+        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+        self.writer = cv2.VideoWriter(self.path, fourcc, self.fps, (frame_width, self.height))
+        self.composite = np.empty((self.height, frame_width, 3), np.uint8)
+
+    def _encode_loop(self):
+        while True:
+            with self.condition:
+                while not self.pending and not self.stopping:
+                    self.condition.wait()
+                if not self.pending:
+                    break
+                buffer, conversion, camera_frame = self.pending.popleft()
+
+            if camera_frame is not None:
+                # Camera view side by side with the game, scaled to the game's height.
+                cam_h, cam_w, _ = camera_frame.shape
+                cam_width = int(cam_w * self.height / cam_h)
+                if self.writer is None:
+                    self._open_writer(self.width + cam_width)
+                cv2.cvtColor(buffer, conversion, dst=self.composite[:, :self.width])
+                self.composite[:, self.width:] = cv2.resize(camera_frame, (self.composite.shape[1] - self.width, self.height))
+            else:
+                if self.writer is None:
+                    self._open_writer(self.width)
+                self.composite[:, self.width:] = 0
+                cv2.cvtColor(buffer, conversion, dst=self.composite[:, :self.width])
+            self.writer.write(self.composite)
+            self.frames_written += 1
+
+            with self.condition:
+                self.free.append(buffer)
+
+    def stop(self):
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.thread.join()
+        if self.writer is not None:
+            self.writer.release()
+        return self.path
+
+# ----------------------------
+# Drop Policy Check
+# ----------------------------
+def check_drop_policy(frames=5):
+    # Keep capturing with a single pooled buffer while the encoder is held off, as when
+    # it falls behind; every capture after the first must drop a frame, not fail.
+    surface = pygame.Surface((64, 48))
+    failures = []
+    for policy in ("oldest", "newest"):
+        path = os.path.join(tempfile.mkdtemp(), "check.mp4")
+        recorder = GameplayRecorder(surface.get_size(), fps=1000, pool_size=1, drop_policy=policy, path=path)
+        with recorder.condition:  # the encoder thread cannot take frames while this is held
+            for _ in range(frames):
+                recorder.next_capture = 0
+                recorder.capture(surface)
+            queued, dropped = len(recorder.pending), recorder.frames_dropped
+        recorder.stop()
+        print(f"{policy:<7} queued {queued} dropped {dropped} written {recorder.frames_written}")
+        if (queued, dropped, recorder.frames_written) != (1, frames - 1, 1):
+            failures.append(policy)
+    return failures
+
+if __name__ == "__main__":
+    sys.exit(1 if check_drop_policy() else 0)
@@ -0,0 +1,204 @@
+# Display backends.
+#
+# The game draws through one of two backends with the same methods:
+#
+#   SurfaceBackend  the original software path: pygame.draw/gfxdraw and surface blits
+#                   onto the display surface. Always available.
+#   TextureBackend  SDL2 Renderer/Texture (pygame._sdl2.video). Fruit, stain and
+#                   effect sprites are uploaded as textures once and every instance is
+#                   drawn with a texture copy plus color and alpha modulation, so
+#                   large alpha blends no longer run on the CPU. Blade trails change
+#                   shape every frame; only their bounding box is re-uploaded.
+#
+# create_display() picks the backend and falls back to the surface path when the SDL2
+# video module or a renderer is not available.
+import copy
+
+import pygame
+import pygame.gfxdraw
+
+CIRCLE_SPRITE_RADIUS = 64  # one white disc, scaled and tinted for particles, rings and cursors
+
+def create_display(backend, size, caption, scaled=True, fullscreen=True):
+    if backend == "texture":
+        try:
+            return TextureBackend.create(size, caption, scaled, fullscreen)
+        except (ImportError, pygame.error) as e:
+            print("Texture renderer unavailable, using the surface renderer:", e)
+    elif backend != "surface":
+        raise ValueError(f"Unknown render backend {backend!r}")
+    flags = (pygame.FULLSCREEN if fullscreen else 0) | (pygame.SCALED if scaled else 0)
+    screen = pygame.display.set_mode(size, flags)
+    pygame.display.set_caption(caption)
+    return SurfaceBackend(screen)
+
+# ----------------------------
+# Software Surface Backend
+# ----------------------------
+class SurfaceBackend:
+    name = "surface"
+
+    def __init__(self, surface):
+        self.surface = surface
+
+    def clear(self, color):
+        self.surface.fill(color)
+
+    def line(self, color, start, end, width=1):
+        pygame.draw.line(self.surface, color, start, end, width)
+
+    def circle(self, color, center, radius):
+        pygame.draw.circle(self.surface, color, center, radius)
+
+    def prepare(self, image):
+        # Turn a surface that is blitted every frame into whatever the backend draws fastest.
+        return image
+
+    def blit(self, image, pos, area=None):
+        self.surface.blit(image, pos, area)
+
+    def draw_fruit(self, fruit):
+        fruit.draw(self.surface)
+
+    def draw_stain(self, stain):
+        stain.draw(self.surface)
+
+    def draw_splash(self, splash):
+        splash.draw(self.surface)
+
+    def draw_slicing_animation(self, anim):
+        anim.draw(self.surface)
+
+    def draw_trail(self, trail, now):
+        trail.draw(self.surface, now)
+
+    def capture(self):
+        # The current frame as a surface (the display surface itself, not a copy).
+        return self.surface
+
+    def present(self):
+        pygame.display.flip()
+
+# ----------------------------
+# SDL2 Texture Backend
+# ----------------------------
+class TextureBackend:
+    name = "texture"
+
+    def __init__(self, renderer, size):
+        from pygame._sdl2.video import Texture
+        self.Texture = Texture
+        self.renderer = renderer
+        disc = pygame.Surface((CIRCLE_SPRITE_RADIUS * 2, CIRCLE_SPRITE_RADIUS * 2), pygame.SRCALPHA)
+        pygame.gfxdraw.aacircle(disc, CIRCLE_SPRITE_RADIUS, CIRCLE_SPRITE_RADIUS, CIRCLE_SPRITE_RADIUS - 1,
+                                (255, 255, 255))
+        pygame.gfxdraw.filled_circle(disc, CIRCLE_SPRITE_RADIUS, CIRCLE_SPRITE_RADIUS, CIRCLE_SPRITE_RADIUS - 1,
+                                     (255, 255, 255))
+        self.circle_texture = Texture.from_surface(renderer, disc)
+        # Trails are filled on this scratch surface and copied into the streaming texture.
+        self.trail_surface = pygame.Surface(size, pygame.SRCALPHA)
+        self.trail_texture = Texture(renderer, size, streaming=True)
+        self.trail_texture.blend_mode = pygame.BLENDMODE_BLEND
+        self.fruit_textures = {}  # (type, radius) -> (texture, half size)
+        self.stain_textures = {}  # (size, color, seed) -> texture
+        self.stains_drawn = set()
+
+    @classmethod
+    def create(cls, size, caption, scaled=True, fullscreen=True):
+        from pygame._sdl2.video import Renderer, Window
+        window = Window(caption, size=size, fullscreen_desktop=fullscreen)
+        renderer = Renderer(window)
+        if scaled:
+            # Same role as pygame.SCALED: draw in game coordinates, SDL scales to the window.
+            renderer.logical_size = size
+        return cls(renderer, size)
+
+    def clear(self, color):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.clear()
+
+    def line(self, color, start, end, width=1):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.draw_line(start, end)
+
+    def disc(self, color, alpha, center, radius):
+        texture = self.circle_texture
+        texture.color = color
+        texture.alpha = alpha
+        texture.draw(dstrect=(int(center[0] - radius), int(center[1] - radius), int(radius * 2), int(radius * 2)))
+
+    def circle(self, color, center, radius):
+        self.disc(color, 255, center, radius)
+
+    def prepare(self, image):
+        return self.Texture.from_surface(self.renderer, image)
+
+    def blit(self, image, pos, area=None):
+        if not isinstance(image, self.Texture):
+            image = self.Texture.from_surface(self.renderer, image)
+        if area is None:
+            area = (0, 0, image.width, image.height)
+        image.draw(srcrect=area, dstrect=(pos[0], pos[1], area[2], area[3]))
+
+    def draw_fruit(self, fruit):
+        key = (fruit.type, fruit.radius)
+        if key not in self.fruit_textures:
+            # Render the fruit once with the surface code, centered on a padded canvas
+            # big enough for stems, fuses and the banana arc.
+            half = max(fruit.radius + 30, 50)
+            canvas = pygame.Surface((half * 2, half * 2), pygame.SRCALPHA)
+            sprite = copy.copy(fruit)
+            sprite.pos = [half, half]
+            sprite.draw(canvas)
+            self.fruit_textures[key] = (self.Texture.from_surface(self.renderer, canvas), half)
+        texture, half = self.fruit_textures[key]
+        texture.draw(dstrect=(int(fruit.pos[0]) - half, int(fruit.pos[1]) - half, half * 2, half * 2))
+
+    def draw_stain(self, stain):
+        key = (stain.size, stain.color, stain.seed)
+        texture = self.stain_textures.get(key)
+        if texture is None:
+            texture = self.stain_textures[key] = self.Texture.from_surface(self.renderer, stain.image)
+        self.stains_drawn.add(key)
+        texture.alpha = int(255 * max(stain.timer / stain.duration, 0))
+        rect = texture.get_rect(center=stain.pos)
+        texture.draw(dstrect=rect)
+
+    def draw_splash(self, splash):
+        alpha = int(255 * max(splash.timer / splash.duration, 0))
+        for p in splash.particles:
+            if p['radius'] > 0:
+                self.disc(splash.color, alpha, p['pos'], p['radius'])
+
+    def draw_slicing_animation(self, anim):
+        # Both quality levels draw the fading disc: the cheap ring only exists to avoid
+        # a per-frame alpha surface, which the texture path never allocates.
+        progress = 1 - (anim.timer / anim.duration)
+        radius = int(progress * anim.max_radius)
+        if radius > 0:
+            self.disc(anim.color, max(255 - int(progress * 255), 0), anim.pos, radius)
+
+    def draw_trail(self, trail, now):
+        # The strip is filled with the same polygon call as the surface backend, so the
+        # thin tail looks the same; only its bounding box is uploaded and drawn.
+        strip = trail.strip(now)
+        if strip is None:
+            return
+        rect = pygame.draw.polygon(self.trail_surface, trail.color, strip)
+        if rect:
+            self.trail_texture.update(self.trail_surface.subsurface(rect), area=rect)
+            self.trail_texture.draw(srcrect=rect, dstrect=rect)
+        # Erasing the same polygon leaves the scratch surface clear for the next trail.
+        pygame.draw.polygon(self.trail_surface, (0, 0, 0, 0), strip)
+
+    def capture(self):
+        # Reads the frame back from the renderer, which is slow; only used for recording
+        # and the idle screen.
+        return self.renderer.to_surface()
+
+    def present(self):
+        self.renderer.present()
+        # Drop textures of stains that have faded out.
+        for key in self.stain_textures.keys() - self.stains_drawn:
+            del self.stain_textures[key]
+        self.stains_drawn = set()
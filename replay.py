@@ -0,0 +1,252 @@
+# Deterministic session replay.
+#
+# A replay log is an append-only binary file: a JSON header with the RNG seed,
+# followed by one compact record per frame (dt, effects level of detail and the
+# cursor samples the game used) and, every KEYFRAME_INTERVAL frames, a pickled
+# snapshot of the full game state. Seeking restores the keyframe at or before the
+# target frame and re-simulates at most KEYFRAME_INTERVAL frames, so it costs the
+# same wherever in the session it lands.
+#
+#   python replay.py replays/session-20260101-120000.fnr
+#
+# Controls: SPACE pause, LEFT/RIGHT seek 5 s, 0-9 jump to 0%-90%, ESC quit.
+# Replay files contain pickled game state; only open replays you recorded yourself.
+import argparse
+import bisect
+import io
+import json
+import os
+import pickle
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+MAGIC = b"FNRP"
+VERSION = 1
+FILE_HEADER = struct.Struct("<HI")       # version, JSON header length
+FRAME = b"F"
+FRAME_HEADER = struct.Struct("<IBB")     # dt in ms, effects level of detail, number of cursors
+CURSOR = struct.Struct("<hhH")           # x, y, cursor age in ms
+KEYFRAME = b"K"
+KEYFRAME_HEADER = struct.Struct("<II")   # frame index, pickle length
+KEYFRAME_INTERVAL = 120                  # frames between snapshots (~2 s at 60 fps)
+MAX_CURSOR_AGE_MS = 1000                 # older cursor samples are clamped by the fruit history anyway
+REPLAY_DIR = "replays"
+
+# ----------------------------
+# Recording
+# ----------------------------
+class ReplayWriter:
+    def __init__(self, header, path=None):
+        if path is None:
+            path = os.path.join(REPLAY_DIR, time.strftime("session-%Y%m%d-%H%M%S.fnr"))
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        header = dict(header, keyframe_interval=KEYFRAME_INTERVAL)
+        encoded = json.dumps(header).encode()
+        self.file = open(self.path, "wb")
+        self.file.write(MAGIC + FILE_HEADER.pack(VERSION, len(encoded)) + encoded)
+        self.frame_index = 0
+
+    def needs_keyframe(self):
+        return self.frame_index % KEYFRAME_INTERVAL == 0
+
+    def write_keyframe(self, state):
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        self.file.write(KEYFRAME + KEYFRAME_HEADER.pack(self.frame_index, len(payload)) + payload)
+
+    def write_frame(self, dt_ms, lod, cursors):
+        # cursors: list of ((x, y), age_ms) exactly as passed to the game update.
+        record = [FRAME, FRAME_HEADER.pack(dt_ms, lod, len(cursors))]
+        record.extend(CURSOR.pack(x, y, age_ms) for (x, y), age_ms in cursors)
+        self.file.write(b"".join(record))
+        self.frame_index += 1
+
+    def close(self):
+        self.file.close()
+        return self.path
+
+def cursor_age_ms(capture_time, now):
+    return min(int((now - capture_time) * 1000), MAX_CURSOR_AGE_MS)
+
+# ----------------------------
+# Reading
+# ----------------------------
+class GameUnpickler(pickle.Unpickler):
+    # Snapshots reference classes from the game script's __main__; resolve them
+    # against the definitions loaded by the viewer instead.
+    def __init__(self, file, game):
+        super().__init__(file)
+        self.game = game
+
+    def find_class(self, module, name):
+        if module in ("__main__", "game_defs") and name in self.game:
+            return self.game[name]
+        return super().find_class(module, name)
+
+class ReplayReader:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        if self.data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        version, header_length = FILE_HEADER.unpack_from(self.data, 4)
+        if version != VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+        pos = 4 + FILE_HEADER.size
+        self.header = json.loads(self.data[pos:pos + header_length])
+        pos += header_length
+        self.interval = self.header["keyframe_interval"]
+
+        self.frames = []     # (dt_ms, lod, cursors)
+        self.keyframes = {}  # frame index -> (offset, length) of the pickled state
+        # A session that crashed mid-write leaves a truncated last record; stop there.
+        while pos < len(self.data):
+            tag = self.data[pos:pos + 1]
+            pos += 1
+            if tag == FRAME and pos + FRAME_HEADER.size <= len(self.data):
+                dt_ms, lod, count = FRAME_HEADER.unpack_from(self.data, pos)
+                end = pos + FRAME_HEADER.size + count * CURSOR.size
+                if end > len(self.data):
+                    break
+                cursors = [((x, y), age_ms) for x, y, age_ms in
+                           CURSOR.iter_unpack(self.data[pos + FRAME_HEADER.size:end])]
+                self.frames.append((dt_ms, lod, cursors))
+                pos = end
+            elif tag == KEYFRAME and pos + KEYFRAME_HEADER.size <= len(self.data):
+                index, length = KEYFRAME_HEADER.unpack_from(self.data, pos)
+                pos += KEYFRAME_HEADER.size
+                if pos + length > len(self.data):
+                    break
+                self.keyframes[index] = (pos, length)
+                pos += length
+            else:
+                break
+        if 0 not in self.keyframes:
+            raise ValueError(f"{path} has no initial keyframe")
+        # Game time at the end of each frame.
+        self.times = np.cumsum([dt_ms for dt_ms, _, _ in self.frames]) / 1000.0
+
+    @property
+    def duration(self):
+        return float(self.times[-1]) if len(self.times) else 0.0
+
+    def frame_at(self, t):
+        # Number of frames to apply so the game clock reaches t.
+        return min(bisect.bisect_left(self.times, t) + 1, len(self.frames))
+
+    def keyframe_before(self, frame_count):
+        # Keyframes are periodic, so the nearest one is found arithmetically.
+        index = min(frame_count, max(len(self.frames) - 1, 0)) // self.interval * self.interval
+        while index not in self.keyframes:
+            index -= self.interval
+        return index
+
+    def load_keyframe(self, index, game):
+        offset, length = self.keyframes[index]
+        return GameUnpickler(io.BytesIO(self.data[offset:offset + length]), game).load()
+
+# ----------------------------
+# Viewer
+# ----------------------------
+class ReplaySession:
+    def __init__(self, reader, game):
+        self.reader = reader
+        self.game = game
+        self.frame = 0  # frames applied so far
+        self.cursors = []
+        self.seek(0)
+
+    def apply(self, index):
+        dt_ms, lod, cursors = self.reader.frames[index]
+        self.game["effects_governor"].level = lod
+        self.game["update_game"](dt_ms / 1000.0, [(pos, age_ms / 1000) for pos, age_ms in cursors])
+        self.cursors = [pos for pos, _ in cursors]
+
+    def seek(self, t):
+        target = self.reader.frame_at(t) if t > 0 else 0
+        start = self.reader.keyframe_before(target)
+        self.game["restore_game"](self.reader.load_keyframe(start, self.game))
+        self.cursors = []
+        for index in range(start, target):
+            self.apply(index)
+        self.frame = target
+
+    def advance_to(self, t):
+        while self.frame < len(self.reader.frames) and self.reader.times[self.frame] <= t:
+            self.apply(self.frame)
+            self.frame += 1
+
+    @property
+    def time(self):
+        return float(self.reader.times[self.frame - 1]) if self.frame else 0.0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch a recorded Fruit Ninja session.")
+    parser.add_argument("replay")
+    parser.add_argument("--script", help="game script to replay with (default: the one that recorded it)")
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args(argv)
+
+    import pygame
+    import governor
+    import render
+    from game_defs import load_definitions
+
+    reader = ReplayReader(args.replay)
+    header = reader.header
+    width, height = header["screen_size"]
+    pygame.init()
+    screen = pygame.display.set_mode((width, height), pygame.SCALED)
+    pygame.display.set_caption(f"Fruit Ninja Replay: {os.path.basename(args.replay)}")
+    display = render.SurfaceBackend(screen)
+    font = pygame.font.Font(None, 36)
+    clock = pygame.time.Clock()
+
+    game = load_definitions(args.script or header["script"], screen_width=width, screen_height=height,
+                            slice_sound=None, bomb_sound=None, telemetry=None,
+                            effects_governor=governor.EffectsGovernor(),
+                            game_rng=random.Random(header["seed"]))
+    session = ReplaySession(reader, game)
+    playback_time = 0.0
+    playing = True
+    running = True
+    while running:
+        dt = clock.tick(60) / 1000.0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    playing = not playing
+                elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                    step = 5 if event.key == pygame.K_RIGHT else -5
+                    playback_time = min(max(session.time + step, 0), reader.duration)
+                    session.seek(playback_time)
+                elif pygame.K_0 <= event.key <= pygame.K_9:
+                    playback_time = reader.duration * (event.key - pygame.K_0) / 10
+                    session.seek(playback_time)
+        if playing:
+            playback_time = min(playback_time + dt * args.speed, reader.duration)
+            session.advance_to(playback_time)
+
+        game["draw_game"](display)
+        for cursor in session.cursors:
+            pygame.draw.circle(screen, (255, 255, 255), cursor, 5)
+        status = f"Replay {session.time:5.1f}/{reader.duration:.1f}s   Score: {game['score']}"
+        if not playing:
+            status += "   (paused)"
+        screen.blit(font.render(status, True, (255, 255, 255)), (10, 10))
+        if reader.duration > 0:
+            progress = int(width * session.time / reader.duration)
+            pygame.draw.rect(screen, (255, 165, 0), (0, height - 6, progress, 6))
+        pygame.display.flip()
+    pygame.quit()
+
+if __name__ == "__main__":
+    sys.exit(main())
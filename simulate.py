@@ -0,0 +1,283 @@
+# Monte Carlo difficulty simulator.
+#
+# Plays thousands of headless games with synthetic cursor agents so spawn and bomb
+# parameters can be tuned without playing by hand. Each worker process runs a batch
+# of games in lockstep with NumPy arrays of shape (games, fruit slots); the spawn
+# timer only depends on elapsed time, so every game in a batch spawns on the same
+# frame and the whole batch advances with a handful of array operations per frame.
+#
+#   python simulate.py                                  # both scripts' presets, all agents
+#   python simulate.py --bomb-base 0.1 0.15 0.2 --games 5000 --json results.json
+#   python simulate.py --check-latency                  # scores must not improve with latency
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SCREEN_WIDTH, SCREEN_HEIGHT = 1280, 720
+GRAVITY = 300
+MAX_FRUITS = 16  # fruit slots per game; more than can be on screen at once
+FRUIT_TYPES = ["fruit", "banana", "watermelon", "bomb"]
+BASE_RADIUS = np.array([20, 20, 30, 20])
+POINTS = np.array([1, 2, 3, 0])
+BOMB = 3
+FRUIT_HISTORY_LENGTH = 12  # frames of fruit positions the game keeps for lag-compensated hit tests
+
+# Difficulty parameters. The presets mirror spawn_fruit() and the spawn ramp in each script.
+PRESETS = {
+    "FinalHand.py": {"bomb_base": 0.2, "bomb_ramp": 0.1, "spawn_start": 2.0, "spawn_drop": 1.5,
+                     "spawn_min": 0.5, "duration": 60},
+    "FinalHand&Face.py": {"bomb_base": 0.1, "bomb_ramp": 0.1, "spawn_start": 2.0, "spawn_drop": 1.5,
+                          "spawn_min": 0.5, "duration": 60},
+}
+
+# Synthetic players: cursor speed (px/s), camera + inference latency (s, which the game's
+# lag compensation rewinds), the player's own reaction time (s, which nothing compensates),
+# aim noise (px) and how far (px) they keep the cursor away from bombs they can see.
+AGENTS = {
+    "novice": {"speed": 900, "pipeline_latency": 0.05, "reaction": 0.10, "aim_noise": 25, "caution": 0},
+    "casual": {"speed": 1500, "pipeline_latency": 0.05, "reaction": 0.05, "aim_noise": 15, "caution": 20},
+    "expert": {"speed": 2500, "pipeline_latency": 0.05, "reaction": 0.01, "aim_noise": 8, "caution": 40},
+}
+
+# Latencies swept by --check-latency, one at a time from the agent's own values.
+CHECK_PIPELINE_LATENCIES = [0.0, 0.05, 0.1, 0.2, 0.3]
+CHECK_REACTIONS = [0.0, 0.05, 0.1, 0.2]
+
+# ----------------------------
+# Worker: Vectorized Batch of Games
+# ----------------------------
+def spawn_types(rng, n, bomb_probability):
+    # Same thresholds as spawn_fruit(): apple, banana, then the shrinking watermelon share.
+    apple_prob, banana_prob = 0.6, 0.15
+    watermelon_prob = 0.15 - (bomb_probability - 0.1)
+    # A negative watermelon share leaves only bombs past apple + banana, as in the if-chain.
+    thresholds = np.maximum.accumulate(np.cumsum([apple_prob, banana_prob, watermelon_prob]))
+    return np.searchsorted(thresholds, rng.random(n), side="right")
+
+def rewind(pos, vel, age, seconds):
+    # Where fruits were `seconds` ago (ballistic, so exact), clamped to their spawn point
+    # like Fruit.position_at() with a history that starts at the spawn.
+    seconds = np.minimum(age, seconds)
+    past = pos - vel * seconds[:, :, None]
+    past[:, :, 1] += 0.5 * GRAVITY * seconds ** 2
+    return past
+
+def simulate_batch(params, agent, games, seed, dt=1 / 60, lag_compensation=True):
+    rng = np.random.default_rng(seed)
+    pos = np.zeros((games, MAX_FRUITS, 2))
+    vel = np.zeros((games, MAX_FRUITS, 2))
+    radius = np.zeros((games, MAX_FRUITS))
+    age = np.zeros((games, MAX_FRUITS))
+    kind = np.zeros((games, MAX_FRUITS), dtype=int)
+    active = np.zeros((games, MAX_FRUITS), dtype=bool)
+    cursor = np.tile([SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2], (games, 1))
+    alive = np.ones(games, dtype=bool)
+    score = np.zeros(games, dtype=int)
+    survival_time = np.full(games, float(params["duration"]))
+    rows = np.arange(games)
+    # The agent reacts to what the camera saw plus their own reaction time ago. The game
+    # only knows about the camera part, and treats samples older than FRUIT_HISTORY_LENGTH
+    # frames as a lost track that is tested against current positions.
+    perceived = agent["pipeline_latency"] + agent["reaction"]
+    compensated = agent["pipeline_latency"]
+    if not lag_compensation or compensated > FRUIT_HISTORY_LENGTH / 60:
+        compensated = 0.0
+    step = agent["speed"] * dt
+
+    elapsed = 0.0
+    last_spawn = 0.0
+    while elapsed < params["duration"] and alive.any():
+        elapsed += dt
+
+        # --- Spawn (same schedule for every game in the batch) ---
+        spawn_interval = max(params["spawn_start"] - (elapsed / params["duration"]) * params["spawn_drop"],
+                             params["spawn_min"])
+        if elapsed - last_spawn > spawn_interval:
+            last_spawn = elapsed
+            can_spawn = alive & ~active.all(axis=1)
+            g = rows[can_spawn]
+            slot = np.argmin(active[g], axis=1)  # first free slot
+            n = len(g)
+            bomb_probability = params["bomb_base"] + params["bomb_ramp"] * (elapsed / params["duration"])
+            kind[g, slot] = spawn_types(rng, n, bomb_probability)
+            pos[g, slot, 0] = rng.integers(50, SCREEN_WIDTH - 50, n, endpoint=True)
+            pos[g, slot, 1] = SCREEN_HEIGHT + 30
+            vel[g, slot, 0] = rng.uniform(-100, 100, n)
+            vel[g, slot, 1] = rng.uniform(-700, -400, n)
+            radius[g, slot] = (BASE_RADIUS[kind[g, slot]] * rng.uniform(1.5, 1.8, n)).astype(int)
+            age[g, slot] = 0.0
+            active[g, slot] = True
+
+        # --- Physics (Fruit.update) ---
+        pos += vel * dt
+        vel[:, :, 1] += GRAVITY * dt
+        age += dt
+        active &= rewind(pos, vel, age, FRUIT_HISTORY_LENGTH / 60)[:, :, 1] < SCREEN_HEIGHT + 50
+
+        # --- Agent: chase the nearest fruit as perceived `perceived` seconds ago ---
+        seen = rewind(pos, vel, age, perceived)
+        offset = seen - cursor[:, None, :]
+        dist = np.hypot(offset[:, :, 0], offset[:, :, 1])
+        is_bomb = kind == BOMB
+        candidate = active & ~is_bomb & (seen[:, :, 1] < SCREEN_HEIGHT)
+        target = np.argmin(np.where(candidate, dist, np.inf), axis=1)
+        has_target = candidate[rows, target] & alive
+        aim = seen[rows, target] + rng.normal(0, agent["aim_noise"], (games, 2))
+        move = aim - cursor
+        length = np.maximum(np.hypot(move[:, 0], move[:, 1]), 1e-9)
+        next_cursor = cursor + move * (np.minimum(step, length) / length)[:, None]
+        cursor[has_target] = next_cursor[has_target]
+
+        # --- Slicing (lag-compensated hit tests use fruit positions at the camera frame's time) ---
+        hit_pos = rewind(pos, vel, age, compensated) if compensated else pos
+        hit_offset = hit_pos - cursor[:, None, :]
+        hits = active & alive[:, None] & (np.hypot(hit_offset[:, :, 0], hit_offset[:, :, 1]) < radius)
+        score += (POINTS[kind] * hits).sum(axis=1)
+        bombed = (hits & is_bomb).any(axis=1)
+        survival_time[bombed] = elapsed
+        alive &= ~bombed
+        active &= ~hits
+
+        # --- Agent: cautious players dodge away from the nearest bomb coming close ---
+        bomb_offset = cursor[:, None, :] - seen
+        bomb_dist = np.hypot(bomb_offset[:, :, 0], bomb_offset[:, :, 1])
+        bomb_gap = np.where(active & is_bomb, bomb_dist - radius, np.inf)
+        nearest = np.argmin(bomb_gap, axis=1)
+        dodging = alive & (bomb_gap[rows, nearest] < agent["caution"])
+        away = bomb_offset[rows, nearest] / np.maximum(bomb_dist[rows, nearest], 1e-9)[:, None]
+        cursor[dodging] += away[dodging] * step
+        np.clip(cursor, 0, [SCREEN_WIDTH, SCREEN_HEIGHT], out=cursor)
+
+    return {"score": score, "survived": alive, "survival_time": survival_time}
+
+# ----------------------------
+# Driver: Process Pool and Summaries
+# ----------------------------
+def summarize(results, duration):
+    score = results["score"]
+    return {
+        "games": int(len(score)),
+        "score_mean": float(score.mean()),
+        "score_std": float(score.std()),
+        "score_p10": float(np.percentile(score, 10)),
+        "score_p50": float(np.percentile(score, 50)),
+        "score_p90": float(np.percentile(score, 90)),
+        "survival_rate": float(results["survived"].mean()),
+        "survival_time_p50": float(np.percentile(results["survival_time"], 50)),
+        "duration": duration,
+    }
+
+def run_simulations(param_sets, agents, games, batch_size, workers, seed, dt, lag_compensation):
+    jobs = []
+    seeds = np.random.SeedSequence(seed)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for (param_name, params), (agent_name, agent) in itertools.product(param_sets.items(), agents.items()):
+            for start in range(0, games, batch_size):
+                n = min(batch_size, games - start)
+                child_seed = seeds.spawn(1)[0]
+                future = pool.submit(simulate_batch, params, agent, n, child_seed, dt, lag_compensation)
+                jobs.append((param_name, agent_name, future))
+        collected = {}
+        for param_name, agent_name, future in jobs:
+            batch = future.result()
+            runs = collected.setdefault((param_name, agent_name), {k: [] for k in batch})
+            for k, v in batch.items():
+                runs[k].append(v)
+    summaries = []
+    for (param_name, agent_name), runs in collected.items():
+        merged = {k: np.concatenate(v) for k, v in runs.items()}
+        summary = summarize(merged, param_sets[param_name]["duration"])
+        summary.update(params=param_name, agent=agent_name)
+        summaries.append(summary)
+    return summaries
+
+def check_latency(param_sets, agents, games, batch_size, workers, seed, dt, lag_compensation):
+    # Sweep each latency component of each agent, with the same seed for every value so
+    # they play the same spawns. A step up in latency that raises the mean score by more
+    # than the noise (2 standard errors of the difference) is a failure.
+    failures = []
+    for agent_name, agent in agents.items():
+        for key, values in (("pipeline_latency", CHECK_PIPELINE_LATENCIES), ("reaction", CHECK_REACTIONS)):
+            sweep = []
+            for value in values:
+                variant = {f"{agent_name} {key}={value:g}": dict(agent, **{key: value})}
+                sweep.append(run_simulations(param_sets, variant, games, batch_size, workers, seed, dt,
+                                             lag_compensation))
+            for param_name in param_sets:
+                previous = None
+                for summaries in sweep:
+                    current = next(s for s in summaries if s["params"] == param_name)
+                    status = ""
+                    if previous is not None:
+                        rise = current["score_mean"] - previous["score_mean"]
+                        noise = 2 * np.hypot(current["score_std"], previous["score_std"]) / np.sqrt(games)
+                        status = f"{rise:+6.1f} (noise {noise:.1f}) " + ("FAIL" if rise > noise else "ok")
+                        if rise > noise:
+                            failures.append((param_name, previous["agent"], current["agent"]))
+                    print(f"{param_name:<32} {current['agent']:<30} {current['score_mean']:7.1f} {status}")
+                    previous = current
+    return failures
+
+def build_param_sets(args):
+    grid = {k: getattr(args, k) for k in PRESETS["FinalHand.py"] if getattr(args, k) is not None}
+    if not grid:
+        return dict(PRESETS)
+    base = PRESETS[args.preset]
+    keys = list(grid)
+    param_sets = {}
+    for values in itertools.product(*(grid[k] for k in keys)):
+        params = dict(base, **dict(zip(keys, values)))
+        name = " ".join(f"{k}={v:g}" for k, v in zip(keys, values))
+        param_sets[name] = params
+    return param_sets
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate games to tune spawn difficulty.")
+    parser.add_argument("--games", type=int, default=2000, help="games per parameter set and agent")
+    parser.add_argument("--batch-size", type=int, default=250, help="games simulated together by one worker")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dt", type=float, default=1 / 60, help="simulation time step in seconds")
+    parser.add_argument("--agent", action="append", choices=sorted(AGENTS), help="only simulate the given agent(s)")
+    parser.add_argument("--no-lag-compensation", action="store_true", help="hit test against current positions")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="FinalHand.py",
+                        help="parameters not given on the command line come from this preset")
+    for key in PRESETS["FinalHand.py"]:
+        parser.add_argument("--" + key.replace("_", "-"), dest=key, type=float, nargs="+",
+                            help="sweep these values")
+    parser.add_argument("--json", help="also write the summaries to this JSON file")
+    parser.add_argument("--check-latency", action="store_true",
+                        help="check that no agent scores better with more latency (exit status 1 if one does)")
+    args = parser.parse_args(argv)
+
+    param_sets = build_param_sets(args)
+    agents = {name: AGENTS[name] for name in (args.agent or AGENTS)}
+    if args.check_latency:
+        failures = check_latency(param_sets, agents, args.games, args.batch_size, args.workers,
+                                 args.seed, args.dt, not args.no_lag_compensation)
+        print(f"{len(failures)} latency step(s) improved the score" if failures else "scores never rise with latency")
+        return 1 if failures else 0
+    t0 = time.perf_counter()
+    summaries = run_simulations(param_sets, agents, args.games, args.batch_size, args.workers,
+                                args.seed, args.dt, not args.no_lag_compensation)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{'parameters':<32} {'agent':<8} {'mean':>7} {'p10':>6} {'p50':>6} {'p90':>6} "
+          f"{'survive':>8} {'t50':>6}")
+    for s in summaries:
+        print(f"{s['params']:<32} {s['agent']:<8} {s['score_mean']:7.1f} {s['score_p10']:6.0f} "
+              f"{s['score_p50']:6.0f} {s['score_p90']:6.0f} {s['survival_rate']:8.1%} {s['survival_time_p50']:6.1f}")
+    total = sum(s["games"] for s in summaries)
+    print(f"{total} games in {elapsed:.1f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"param_sets": param_sets, "agents": agents, "summaries": summaries}, f, indent=2)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# Session telemetry.
+#
+# The game loop only appends to in-memory buffers. A background thread writes the
+# buffered events to a local SQLite database in one transaction per flush, and the
+# frame-time and latency summaries are written once when the session is closed.
+import collections
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+TELEMETRY_DB = os.path.join(os.path.expanduser("~"), ".fruitninja", "telemetry.db")
+FLUSH_INTERVAL = 2.0  # seconds between batched writes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script TEXT,
+    started_at REAL,
+    ended_at REAL,
+    ended_by TEXT,
+    final_score INTEGER,
+    frames INTEGER,
+    frame_ms_mean REAL,
+    frame_ms_p50 REAL,
+    frame_ms_p95 REAL,
+    frame_ms_max REAL,
+    latency_ms_mean REAL,
+    latency_ms_p50 REAL,
+    latency_ms_p95 REAL,
+    latency_ms_max REAL
+);
+CREATE TABLE IF NOT EXISTS events (
+    session_id INTEGER REFERENCES sessions (id),
+    t REAL,            -- seconds since the session started
+    kind TEXT,         -- "slice", "bomb", "mode", ...
+    detail TEXT,       -- fruit type for slices, new mode for mode changes
+    score INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_by_session ON events (session_id, kind);
+"""
+
+def summarize_ms(samples):
+    if not samples:
+        return [None] * 4
+    values = np.asarray(samples) * 1000
+    return [float(values.mean()), float(np.percentile(values, 50)),
+            float(np.percentile(values, 95)), float(values.max())]
+
+class TelemetryStore:
+    def __init__(self, script, path=TELEMETRY_DB, flush_interval=FLUSH_INTERVAL):
+        self.script = script
+        self.path = path
+        self.flush_interval = flush_interval
+        self.started_at = time.time()
+        # deque append/popleft are thread-safe, so the game loop never takes a lock.
+        self.events = collections.deque()
+        self.frame_times = []
+        self.latencies = []
+        self.ended_by = None
+        self.final_score = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._write_loop, name="telemetry-writer", daemon=True)
+        self.thread.start()
+
+    # ----------------------------
+    # Hot-path recording (game loop)
+    # ----------------------------
+    def record_event(self, kind, detail=None, score=None):
+        self.events.append((time.time() - self.started_at, kind, detail, score))
+
+    def record_slice(self, fruit_type, score):
+        self.record_event("slice", fruit_type, score)
+
+    def record_bomb(self, score):
+        self.record_event("bomb", "bomb", score)
+
+    def record_frame(self, frame_time, latency=None):
+        self.frame_times.append(frame_time)
+        if latency is not None:
+            self.latencies.append(latency)
+
+    # ----------------------------
+    # Background writer
+    # ----------------------------
+    def _flush(self, conn, session_id):
+        batch = [self.events.popleft() for _ in range(len(self.events))]
+        if batch:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO events (session_id, t, kind, detail, score) VALUES (?, ?, ?, ?, ?)",
+                    [(session_id,) + event for event in batch])
+
+    def _write_loop(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        try:
+            conn.executescript(SCHEMA)
+            with conn:
+                session_id = conn.execute("INSERT INTO sessions (script, started_at) VALUES (?, ?)",
+                                          (self.script, self.started_at)).lastrowid
+            while not self.stop_event.wait(self.flush_interval):
+                self._flush(conn, session_id)
+            self._flush(conn, session_id)
+            with conn:
+                conn.execute(
+                    "UPDATE sessions SET ended_at = ?, ended_by = ?, final_score = ?, frames = ?, "
+                    "frame_ms_mean = ?, frame_ms_p50 = ?, frame_ms_p95 = ?, frame_ms_max = ?, "
+                    "latency_ms_mean = ?, latency_ms_p50 = ?, latency_ms_p95 = ?, latency_ms_max = ? "
+                    "WHERE id = ?",
+                    [time.time(), self.ended_by, self.final_score, len(self.frame_times)]
+                    + summarize_ms(self.frame_times) + summarize_ms(self.latencies) + [session_id])
+        finally:
+            conn.close()
+
+    def close(self, final_score, ended_by):
+        self.final_score = final_score
+        self.ended_by = ended_by
+        self.stop_event.set()
+        self.thread.join()
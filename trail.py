@@ -0,0 +1,70 @@
+# Blade trail behind the cursor.
+#
+# Cursor samples live in a fixed-size NumPy ring buffer, so recording a sample never
+# allocates. Each frame the live samples are turned into one tapered polygon strip
+# in a single vectorized pass and drawn with one polygon call; older samples make
+# the strip narrower, so the trail thins out behind the cursor and shrinks away when
+# it stops. The same buffer answers swipe-speed queries.
+import numpy as np
+import pygame
+
+class BladeTrail:
+    def __init__(self, capacity=32, lifetime=0.25, max_width=14, color=(255, 255, 255)):
+        self.capacity = capacity
+        self.lifetime = lifetime      # seconds a sample stays visible
+        self.max_width = max_width    # strip width at the newest sample, in pixels
+        self.color = color
+        self.samples = np.zeros((capacity, 3))  # rows of (time, x, y)
+        self.head = 0                            # next slot to write
+        self.count = 0
+        self.offsets = np.arange(capacity)
+
+    def add(self, t, pos):
+        self.samples[self.head] = (t, pos[0], pos[1])
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+    def recent(self, since):
+        # Samples newer than `since`, oldest first.
+        order = (self.head - self.count + self.offsets[:self.count]) % self.capacity
+        samples = self.samples[order]
+        return samples[samples[:, 0] >= since]
+
+    def speed(self, now, window=0.1):
+        # Swipe speed in pixels per second over the last `window` seconds.
+        samples = self.recent(now - window)
+        if len(samples) < 2:
+            return 0.0
+        path = np.hypot(*np.diff(samples[:, 1:], axis=0).T).sum()
+        duration = samples[-1, 0] - samples[0, 0]
+        return float(path / duration) if duration > 0 else 0.0
+
+    def shape(self, now):
+        # Live samples as (points, widths), oldest first; None if there is no strip.
+        samples = self.recent(now - self.lifetime)
+        if len(samples) < 2:
+            return None
+        # The strip narrows with each sample's age and tapers to nothing at the tail.
+        freshness = np.clip(1 - (now - samples[:, 0]) / self.lifetime, 0, 1)
+        widths = self.max_width * freshness * np.linspace(0, 1, len(samples))
+        return samples[:, 1:], widths
+
+    def strip(self, now):
+        # The strip outline as a list of integer points for a polygon fill; None if empty.
+        shape = self.shape(now)
+        if shape is None:
+            return None
+        points, widths = shape
+        tangents = np.gradient(points, axis=0)
+        lengths = np.maximum(np.hypot(tangents[:, 0], tangents[:, 1]), 1e-6)
+        normals = np.column_stack((-tangents[:, 1], tangents[:, 0])) / lengths[:, None]
+        edge = normals * (widths / 2)[:, None]
+        return np.concatenate((points + edge, (points - edge)[::-1])).astype(int).tolist()
+
+    def draw(self, surface, now):
+        strip = self.strip(now)
+        if strip is not None:
+            pygame.draw.polygon(surface, self.color, strip)
@@ -0,0 +1,147 @@
+# Automatic MediaPipe tuning.
+#
+# On the first run on a machine, a short clip is recorded from the webcam and every
+# combination of model complexity and inference resolution is benchmarked on it.
+# The fastest-but-stable configuration is cached per host, so later startups load
+# it straight from disk. Delete the cache file to force a new calibration. When
+# nothing is detected (say a kiosk booting with nobody in front of it), the defaults
+# are cached as uncalibrated and calibration is retried at most once a day.
+import json
+import os
+import socket
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+import governor
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".fruitninja")
+CALIBRATION_SECONDS = 3.0
+INPUT_WIDTHS = (320, 480, 640)
+# Inference may use half of a game frame; update and render need the rest.
+LATENCY_BUDGET = governor.FRAME_BUDGET / 2
+UNCALIBRATED_RETRY = 24 * 3600  # seconds before an uncalibrated cache is retried
+DEFAULT_CONFIG = {"model_complexity": 1, "input_width": None}
+
+# ----------------------------
+# Landmark Readers
+# ----------------------------
+def read_hand_landmark(results):
+    if results.multi_hand_landmarks:
+        lm = results.multi_hand_landmarks[0].landmark[8]  # index finger tip
+        return (lm.x, lm.y)
+    return None
+
+def read_iris_landmark(results):
+    if results.multi_face_landmarks:
+        landmarks = results.multi_face_landmarks[0].landmark
+        iris_points = [landmarks[i] for i in range(468, 473)]
+        return (sum(pt.x for pt in iris_points) / len(iris_points),
+                sum(pt.y for pt in iris_points) / len(iris_points))
+    return None
+
+# ----------------------------
+# Utility: Downscale a Frame Before Inference
+# ----------------------------
+def resize_for_inference(frame, width):
+    # Landmarks are normalized, so callers keep mapping with the original frame size.
+    if width is None or frame.shape[1] <= width:
+        return frame
+    height = int(frame.shape[0] * width / frame.shape[1])
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+# ----------------------------
+# Calibration
+# ----------------------------
+def cache_path(name):
+    return os.path.join(CACHE_DIR, f"{name}-{socket.gethostname()}.json")
+
+def record_clip(cap, seconds=CALIBRATION_SECONDS):
+    frames = []
+    end_time = time.time() + seconds
+    while time.time() < end_time:
+        ret, frame = cap.read()
+        if ret:
+            frames.append(cv2.flip(frame, 1))
+    return frames
+
+def measure(graph, clip, input_width, read_landmark):
+    latencies = []
+    points = []
+    for frame in clip:
+        frame_rgb = cv2.cvtColor(resize_for_inference(frame, input_width), cv2.COLOR_BGR2RGB)
+        t0 = time.perf_counter()
+        results = graph.process(frame_rgb)
+        latencies.append(time.perf_counter() - t0)
+        points.append(read_landmark(results))
+    detected = np.array([p for p in points if p is not None], dtype=float)
+    # Jitter is the mean second difference of the landmark track: smooth hand motion
+    # has a small second difference, landmark noise does not.
+    if len(detected) >= 3:
+        jitter = float(np.mean(np.hypot(*(detected[2:] - 2 * detected[1:-1] + detected[:-2]).T)))
+    else:
+        jitter = float("inf")
+    return {
+        "latency": float(np.median(latencies)),
+        "detection_rate": len(detected) / max(len(points), 1),
+        "jitter": jitter,
+    }
+
+def choose_config(measurements, latency_budget=LATENCY_BUDGET):
+    detecting = [m for m in measurements if m["detection_rate"] > 0]
+    if not detecting:
+        return None
+    # When nothing fits the budget (common for Hands on a CPU), the over-budget configs
+    # are ranked the same way: detection and stability first, then speed.
+    candidates = [m for m in detecting if m["latency"] <= latency_budget] or detecting
+    return min(candidates, key=lambda m: (-round(m["detection_rate"], 1), m["jitter"], m["latency"]))
+
+def save_cache(path, cached):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(cached, f, indent=2)
+
+def load_or_calibrate(name, cap, build_graph, read_landmark, complexities=(None,), latency_budget=LATENCY_BUDGET):
+    key = {
+        "mediapipe": getattr(mp, "__version__", "unknown"),
+        "camera": [int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))],
+        "latency_budget": latency_budget,
+    }
+    path = cache_path(name)
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        if cached.get("key") == key:
+            if cached.get("calibrated", True) or time.time() - cached.get("time", 0) < UNCALIBRATED_RETRY:
+                return cached["config"]
+    except (OSError, ValueError):
+        pass
+
+    print(f"Calibrating {name} tracking for this machine, keep your {name} in view...")
+    clip = record_clip(cap)
+    measurements = []
+    for complexity in complexities:
+        for input_width in INPUT_WIDTHS:
+            # A fresh graph per combination so tracking state doesn't carry over.
+            graph = build_graph(complexity)
+            try:
+                result = measure(graph, clip, input_width, read_landmark)
+            finally:
+                graph.close()
+            result.update(model_complexity=complexity, input_width=input_width)
+            measurements.append(result)
+
+    best = choose_config(measurements, latency_budget)
+    if best is None:
+        print(f"No {name} detected during calibration, using default settings.")
+        config = dict(DEFAULT_CONFIG)
+        save_cache(path, {"key": key, "config": config, "calibrated": False, "time": time.time(),
+                          "measurements": measurements})
+        return config
+    config = {"model_complexity": best["model_complexity"], "input_width": best["input_width"]}
+    save_cache(path, {"key": key, "config": config, "calibrated": True, "time": time.time(),
+                      "measurements": measurements})
+    print(f"Calibrated {name} tracking:", config)
+    return config